@@ -0,0 +1,696 @@
+# Backends de almacenamiento intercambiables (JSON, SQLite o particiones por fecha)
+
+import json
+import os
+import sqlite3
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+from .persistencia import (DiarioCambios, codificar_json, escribir_json_atomico, escribir_atomico,
+                           firma_archivo, leer_binario)
+from .codec import FORMATO_DATOS, leer_json
+from .config import ConfiguracionApp
+
+# Datos en el formato de codificar_datos(): {'formato': 2, 'recursos': [...], 'eventos': [...], ...}
+Datos = Dict[str, List[Dict]]
+
+class Almacenamiento:
+    """
+    Interfaz común de los backends de persistencia
+
+    Los backends intercambian los datos como diccionarios con el formato de
+    codificar_datos(), así que el gestor no depende de cómo se guardan. Las
+    mutaciones llegan como registros {'op': ...} del mismo tipo que los del
+    diario de cambios.
+    """
+
+    nombre = ""
+    # Indica si el backend puede guardar una instantánea binaria junto a sus datos
+    soporta_binario = False
+
+    def cargar(self) -> Optional[Tuple[Datos, List[Dict]]]:
+        """
+        Lee los datos guardados
+
+        Returns:
+            Tupla (datos, registros pendientes de reproducir), o None si aún
+            no hay nada guardado
+        """
+        raise NotImplementedError
+
+    def guardar(self, datos: Datos) -> None:
+        """Reemplaza todo lo guardado por una instantánea completa"""
+        raise NotImplementedError
+
+    def registrar(self, *registros: Dict) -> None:
+        """Persiste una o varias mutaciones"""
+        raise NotImplementedError
+
+    def cargar_binario(self) -> Optional[Tuple[Any, List[Dict]]]:
+        """
+        Lee la instantánea binaria si existe y está al día
+
+        Returns:
+            Tupla (objeto guardado, registros pendientes de reproducir), o None
+            si no hay instantánea utilizable
+        """
+        return None
+
+    def guardar_binario(self, partes: List[bytes]) -> None:
+        """Escribe una instantánea binaria ya serializada"""
+
+    @property
+    def requiere_compactacion(self) -> bool:
+        """Indica si conviene reescribir una instantánea completa"""
+        return False
+
+    @property
+    def historial_pendiente(self) -> bool:
+        """Indica si quedan eventos guardados que cargar() no entregó"""
+        return False
+
+    def cambios_externos(self) -> bool:
+        """Comprobación barata de si otro proceso guardó cambios desde la última lectura"""
+        return False
+
+    def refrescar(self) -> Optional[Tuple[Optional[Datos], List[Dict]]]:
+        """
+        Lee lo que otros procesos guardaron desde la última lectura o escritura
+
+        Returns:
+            None si no hay cambios; (None, registros) si solo hay registros
+            nuevos; (datos, registros) si cambió la instantánea. Si `datos`
+            trae 'rangos' (lista de (desde, hasta) semiabiertos), sus eventos
+            son solo los que empiezan en esos rangos y el resto no cambió.
+        """
+        return None
+
+    def cargar_particiones(self, desde: Optional[datetime] = None,
+                           hasta: Optional[datetime] = None) -> List[Dict]:
+        """
+        Eventos guardados que cargar() no entregó y que solapan [desde, hasta]
+
+        Sin límites se devuelven todos. Los backends que cargan todo de una vez
+        devuelven siempre una lista vacía.
+        """
+        return []
+
+    def estadisticas(self) -> Optional[Dict]:
+        """
+        Estadísticas de todos los eventos guardados, incluidos los que cargar() no entregó
+
+        El planificador solo las pide con historial pendiente; el resto de
+        backends lo carga todo y devuelve None.
+        """
+        return None
+
+    def cerrar(self) -> None:
+        """Libera los recursos abiertos por el backend"""
+
+
+class AlmacenamientoJSON(Almacenamiento):
+    """
+    Instantánea JSON más diario de cambios en JSON Lines
+
+    Junto al JSON puede guardarse una copia binaria (weddings.bin) que se
+    escribe después de él; solo se usa si no es más antigua que el JSON.
+    """
+
+    nombre = "json"
+    soporta_binario = True
+
+    def __init__(self, data_dir: str, umbral_compactacion: int):
+        self.archivo = os.path.join(data_dir, "weddings.json")
+        self.archivo_binario = os.path.join(data_dir, "weddings.bin")
+        self.diario = DiarioCambios(os.path.join(data_dir, "weddings.journal"))
+        self.umbral_compactacion = umbral_compactacion
+        # Firma de la instantánea que refleja la memoria, para detectar compactaciones ajenas
+        self._firma = None
+
+    def cargar(self) -> Optional[Tuple[Datos, List[Dict]]]:
+        if not os.path.exists(self.archivo):
+            return None
+        self._firma = firma_archivo(self.archivo)
+        return leer_json(self.archivo), self.diario.leer()
+
+    def guardar(self, datos: Datos) -> None:
+        escribir_json_atomico(self.archivo, datos)
+        self._firma = firma_archivo(self.archivo)
+        try:
+            self.diario.vaciar()
+        except OSError as e:
+            # La instantánea ya contiene los registros; reproducirlos es inofensivo
+            print(f"Error vaciando el diario: {e}")
+
+    def registrar(self, *registros: Dict) -> None:
+        self.diario.registrar(*registros)
+
+    def cambios_externos(self) -> bool:
+        return firma_archivo(self.archivo) != self._firma or self.diario.hay_nuevos
+
+    def refrescar(self) -> Optional[Tuple[Optional[Datos], List[Dict]]]:
+        if firma_archivo(self.archivo) == self._firma:
+            registros = self.diario.leer_nuevos()
+            if registros is not None:
+                return (None, registros) if registros else None
+        # Otro proceso compactó: instantánea nueva más su diario completo. Una
+        # línea a medias puede ser una escritura en curso, así que no se trunca.
+        self._firma = firma_archivo(self.archivo)
+        if self._firma is None:
+            return None
+        return leer_json(self.archivo), self.diario.leer(reparar=False)
+
+    def cargar_binario(self) -> Optional[Tuple[Any, List[Dict]]]:
+        if not (os.path.exists(self.archivo_binario) and os.path.exists(self.archivo)):
+            return None
+        firma = firma_archivo(self.archivo)
+        if os.stat(self.archivo_binario).st_mtime_ns < firma[0]:
+            return None
+        try:
+            objeto = leer_binario(self.archivo_binario)
+        except Exception as e:
+            print(f"Aviso: instantánea binaria descartada ({e}); se usa el JSON")
+            return None
+        self._firma = firma
+        return objeto, self.diario.leer()
+
+    def guardar_binario(self, partes: List[bytes]) -> None:
+        escribir_atomico(self.archivo_binario, partes)
+
+    @property
+    def requiere_compactacion(self) -> bool:
+        return self.diario.num_registros >= self.umbral_compactacion
+
+
+class AlmacenamientoSQLite(Almacenamiento):
+    """
+    Base de datos SQLite con una tabla por entidad
+
+    Los recursos de cada evento viven en la tabla `asignaciones`. Las
+    consultas (solapamientos, rangos de fechas, estadísticas) las resuelven
+    los índices en memoria del gestor, así que las tablas solo se leen al
+    cargar y no llevan índices secundarios que encarezcan las escrituras.
+    Las fechas se guardan en ISO 8601.
+
+    Cada mutación deja además su registro en la tabla `cambios`, numerado
+    por una secuencia creciente; otro proceso lee solo los registros
+    posteriores al último que vio. Una instantánea completa deja un
+    registro {'op': 'instantanea'} que obliga a releer todo.
+    """
+
+    nombre = "sqlite"
+    # Registros de `cambios` que se conservan para los procesos que van por detrás
+    RETENCION_CAMBIOS = 1000
+
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS recursos (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            capacidad INTEGER NOT NULL DEFAULT 1,
+            precio REAL NOT NULL DEFAULT 0,
+            disponible INTEGER NOT NULL DEFAULT 1,
+            descripcion TEXT NOT NULL DEFAULT ''
+        );
+        CREATE TABLE IF NOT EXISTS eventos (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            inicio TEXT NOT NULL,
+            fin TEXT NOT NULL,
+            descripcion TEXT NOT NULL DEFAULT '',
+            tipo_boda TEXT NOT NULL,
+            presupuesto REAL NOT NULL DEFAULT 0,
+            estado TEXT NOT NULL,
+            num_invitados INTEGER NOT NULL DEFAULT 0,
+            fecha_creacion TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS asignaciones (
+            evento_id INTEGER NOT NULL,
+            recurso_id INTEGER NOT NULL,
+            posicion INTEGER NOT NULL,
+            inicio TEXT NOT NULL,
+            fin TEXT NOT NULL,
+            unidades INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (evento_id, recurso_id)
+        );
+        CREATE TABLE IF NOT EXISTS restricciones (
+            orden INTEGER PRIMARY KEY,
+            tipo TEXT NOT NULL,
+            recursos_involucrados TEXT NOT NULL,
+            descripcion TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS cambios (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            registro TEXT NOT NULL
+        );
+        DROP INDEX IF EXISTS idx_asignaciones_recurso;
+        DROP INDEX IF EXISTS idx_eventos_estado;
+        DROP INDEX IF EXISTS idx_eventos_inicio;
+    """
+
+    def __init__(self, data_dir: str):
+        self.archivo = os.path.join(data_dir, "weddings.db")
+        # Streamlit atiende cada recarga en un hilo distinto
+        self.conexion = sqlite3.connect(self.archivo, check_same_thread=False)
+        self.conexion.executescript(self.ESQUEMA)
+        # data_version cambia cuando otra conexión confirma una transacción
+        self._version = self._version_datos()
+        # Último registro de `cambios` que ya refleja la memoria del gestor
+        self._ultimo_cambio = self._secuencia()
+
+    def _version_datos(self) -> int:
+        return self.conexion.execute("PRAGMA data_version").fetchone()[0]
+
+    def _secuencia(self) -> int:
+        return self.conexion.execute("SELECT COALESCE(MAX(seq), 0) FROM cambios").fetchone()[0]
+
+    def cambios_externos(self) -> bool:
+        return self._version_datos() != self._version
+
+    def refrescar(self) -> Optional[Tuple[Optional[Datos], List[Dict]]]:
+        if not self.cambios_externos():
+            return None
+        self._version = self._version_datos()
+        minimo, = self.conexion.execute("SELECT MIN(seq) FROM cambios").fetchone()
+        if minimo is not None and minimo > self._ultimo_cambio + 1:
+            # Se podaron registros que este proceso no llegó a leer
+            return self.cargar()
+
+        registros = []
+        for seq, registro in self.conexion.execute(
+                "SELECT seq, registro FROM cambios WHERE seq > ? ORDER BY seq", (self._ultimo_cambio,)):
+            registro = json.loads(registro)
+            if registro.get('op') == 'instantanea':
+                return self.cargar()
+            registros.append(registro)
+            self._ultimo_cambio = seq
+        return None, registros
+
+    def _anotar_cambios(self, *registros: Dict) -> None:
+        """Añade registros a `cambios` (dentro de la transacción de la mutación)"""
+        anterior = self._secuencia()
+        self.conexion.executemany("INSERT INTO cambios (registro) VALUES (?)",
+                                  [(json.dumps(r, ensure_ascii=False),) for r in registros])
+        ultimo = self._secuencia()
+        self.conexion.execute("DELETE FROM cambios WHERE seq <= ?", (ultimo - self.RETENCION_CAMBIOS,))
+        # Si nadie escribió desde la última lectura, los registros propios no hace falta releerlos
+        if anterior == self._ultimo_cambio:
+            self._ultimo_cambio = ultimo
+
+    def cargar(self) -> Optional[Tuple[Datos, List[Dict]]]:
+        self._version = self._version_datos()
+        # La secuencia se lee antes que los datos: un cambio intermedio se
+        # reaplicaría al refrescar, y reaplicar registros no tiene efecto
+        self._ultimo_cambio = self._secuencia()
+        cursor = self.conexion.cursor()
+        if cursor.execute("SELECT COUNT(*) FROM recursos").fetchone()[0] == 0:
+            return None
+
+        # Formato normalizado: los calendarios se reconstruyen a partir de los eventos
+        solicitados: Dict[int, List[int]] = {}
+        unidades: Dict[int, Dict[str, int]] = {}
+        for evento_id, recurso_id, n in cursor.execute(
+                "SELECT evento_id, recurso_id, unidades FROM asignaciones "
+                "ORDER BY evento_id, posicion"):
+            solicitados.setdefault(evento_id, []).append(recurso_id)
+            if n != 1:
+                unidades.setdefault(evento_id, {})[str(recurso_id)] = n
+
+        recursos = [
+            {
+                'id': rid, 'nombre': nombre, 'tipo': tipo, 'capacidad': capacidad,
+                'precio': precio, 'disponible': bool(disponible), 'descripcion': descripcion
+            }
+            for rid, nombre, tipo, capacidad, precio, disponible, descripcion in cursor.execute(
+                "SELECT id, nombre, tipo, capacidad, precio, disponible, descripcion "
+                "FROM recursos ORDER BY id")
+        ]
+        eventos = [
+            {
+                'id': eid, 'nombre': nombre, 'inicio': inicio, 'fin': fin,
+                'recursos_solicitados': solicitados.get(eid, []), 'descripcion': descripcion,
+                'tipo_boda': tipo_boda, 'presupuesto': presupuesto, 'estado': estado,
+                'num_invitados': num_invitados, 'fecha_creacion': fecha_creacion,
+                'unidades_solicitadas': unidades.get(eid, {})
+            }
+            for (eid, nombre, inicio, fin, descripcion, tipo_boda, presupuesto, estado,
+                 num_invitados, fecha_creacion) in cursor.execute(
+                "SELECT id, nombre, inicio, fin, descripcion, tipo_boda, presupuesto, estado, "
+                "num_invitados, fecha_creacion FROM eventos ORDER BY id")
+        ]
+        restricciones = [
+            {'tipo': tipo, 'recursos_involucrados': json.loads(involucrados), 'descripcion': descripcion}
+            for tipo, involucrados, descripcion in cursor.execute(
+                "SELECT tipo, recursos_involucrados, descripcion FROM restricciones ORDER BY orden")
+        ]
+        datos = {'formato': FORMATO_DATOS, 'recursos': recursos, 'eventos': eventos,
+                 'restricciones': restricciones}
+        return datos, []
+
+    def guardar(self, datos: Datos) -> None:
+        with self.conexion:
+            for tabla in ('asignaciones', 'eventos', 'recursos', 'restricciones'):
+                self.conexion.execute(f"DELETE FROM {tabla}")
+            self.conexion.executemany(
+                "INSERT INTO recursos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(r['id'], r['nombre'], r['tipo'], r.get('capacidad', 1), r.get('precio', 0.0),
+                  int(r.get('disponible', True)), r.get('descripcion', ''))
+                 for r in datos.get('recursos', [])]
+            )
+            self.conexion.executemany(
+                "INSERT INTO restricciones VALUES (?, ?, ?, ?)",
+                [(orden, r['tipo'], json.dumps(r['recursos_involucrados']), r['descripcion'])
+                 for orden, r in enumerate(datos.get('restricciones', []))]
+            )
+            for evento in datos.get('eventos', []):
+                self._insertar_evento(evento)
+            self._anotar_cambios({'op': 'instantanea'})
+
+    def registrar(self, *registros: Dict) -> None:
+        with self.conexion:
+            self._anotar_cambios(*registros)
+            for registro in registros:
+                if registro['op'] == 'crear_evento':
+                    self._insertar_evento(registro['evento'])
+                elif registro['op'] == 'eliminar_evento':
+                    self.conexion.execute("DELETE FROM asignaciones WHERE evento_id = ?", (registro['id'],))
+                    self.conexion.execute("DELETE FROM eventos WHERE id = ?", (registro['id'],))
+                elif registro['op'] == 'cambiar_estado':
+                    self.conexion.execute("UPDATE eventos SET estado = ? WHERE id = ?",
+                                          (registro['estado'], registro['id']))
+
+    def _insertar_evento(self, e: Dict) -> None:
+        """Inserta un evento y una asignación por cada recurso solicitado"""
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO eventos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (e['id'], e['nombre'], e['inicio'], e['fin'], e.get('descripcion', ''),
+             e.get('tipo_boda', 'Personalizada'), e.get('presupuesto', 0.0),
+             e.get('estado', 'pendiente'), e.get('num_invitados', 0),
+             e.get('fecha_creacion', datetime.now().isoformat()))
+        )
+        unidades = e.get('unidades_solicitadas', {})
+        self.conexion.executemany(
+            "INSERT OR REPLACE INTO asignaciones VALUES (?, ?, ?, ?, ?, ?)",
+            [(e['id'], rid, posicion, e['inicio'], e['fin'], unidades.get(str(rid), 1))
+             for posicion, rid in enumerate(e['recursos_solicitados'])]
+        )
+
+    def cerrar(self) -> None:
+        self.conexion.close()
+
+
+class AlmacenamientoParticionado(Almacenamiento):
+    """
+    Eventos repartidos en un archivo JSON por mes (o por año) más un manifiesto
+
+    El manifiesto guarda los recursos, las restricciones y un resumen de cada
+    partición (archivo, fechas extremas, recuento por estado y crc32). Al
+    cargar solo se leen las particiones de la ventana activa, desde hace
+    `dias_activos` días en adelante; las anteriores se leen bajo demanda con
+    cargar_particiones(). Cada guardado reescribe solo las particiones que
+    cambian y después el manifiesto, que es el que confirma la escritura.
+    """
+
+    nombre = "particionado"
+    # Unidad de partición -> longitud del prefijo ISO 8601 que la identifica
+    UNIDADES = {'mes': 7, 'año': 4}
+
+    def __init__(self, data_dir: str, unidad: str = "mes", dias_activos: int = 31):
+        if unidad not in self.UNIDADES:
+            raise ValueError(f"Unidad de partición desconocida: {unidad} (opciones: {', '.join(self.UNIDADES)})")
+        self.directorio = os.path.join(data_dir, "particiones")
+        self.archivo_manifiesto = os.path.join(self.directorio, "manifiesto.json")
+        self.unidad = unidad
+        self.dias_activos = dias_activos
+        self._manifiesto: Optional[Dict] = None
+        self._firma = None
+        # Particiones cuyos eventos tiene el gestor en memoria (None: aún no se cargó nada)
+        self._cargadas: Optional[Set[str]] = None
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def _clave(self, inicio: str) -> str:
+        """Partición de un evento según su fecha de inicio en ISO 8601"""
+        return inicio[:self.UNIDADES[self.unidad]]
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"eventos_{clave}.json")
+
+    def _leer_manifiesto(self) -> Optional[Dict]:
+        if self._manifiesto is None and os.path.exists(self.archivo_manifiesto):
+            self._firma = firma_archivo(self.archivo_manifiesto)
+            manifiesto = leer_json(self.archivo_manifiesto)
+            # Los archivos existentes mandan sobre la configuración
+            self.unidad = manifiesto.get('particion', self.unidad)
+            self._manifiesto = manifiesto
+        return self._manifiesto
+
+    def _leer_particion(self, clave: str) -> List[Dict]:
+        return leer_json(self._ruta(clave))['eventos']
+
+    def _escribir_particion(self, clave: str, eventos: List[Dict],
+                            anterior: Optional[Dict]) -> Optional[Dict]:
+        """
+        Escribe una partición si su contenido cambió y retorna su resumen
+        Una partición vacía no se escribe: retorna None
+        """
+        if not eventos:
+            return None
+        eventos = sorted(eventos, key=lambda e: e['id'])
+        contenido = codificar_json({'formato': FORMATO_DATOS, 'eventos': eventos})
+        crc = zlib.crc32(contenido)
+        ruta = self._ruta(clave)
+        if anterior is None or anterior.get('crc') != crc or not os.path.exists(ruta):
+            escribir_atomico(ruta, [contenido])
+
+        estados: Dict[str, List] = {}
+        for e in eventos:
+            acumulado = estados.setdefault(e.get('estado', 'pendiente'), [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += e.get('presupuesto', 0.0)
+        return {
+            'archivo': os.path.basename(ruta),
+            'eventos': len(eventos),
+            'inicio_min': min(e['inicio'] for e in eventos),
+            'fin_max': max(e['fin'] for e in eventos),
+            'estados': estados,
+            'crc': crc
+        }
+
+    def _confirmar(self, manifiesto: Dict, descartadas: Set[str]) -> None:
+        """Escribe el manifiesto y borra los archivos de las particiones que quedaron vacías"""
+        escribir_json_atomico(self.archivo_manifiesto, manifiesto)
+        self._manifiesto = manifiesto
+        self._firma = firma_archivo(self.archivo_manifiesto)
+        for clave in descartadas:
+            try:
+                os.remove(self._ruta(clave))
+            except FileNotFoundError:
+                pass
+
+    def _activas(self, manifiesto: Dict) -> Set[str]:
+        """Particiones de la ventana activa: desde la del corte y las que terminan después de él"""
+        corte = (datetime.now() - timedelta(days=self.dias_activos)).isoformat()
+        return {
+            clave for clave, info in manifiesto['particiones'].items()
+            if clave >= self._clave(corte) or info['fin_max'] >= corte
+        }
+
+    def _datos(self, manifiesto: Dict, claves: Set[str]) -> Datos:
+        """Datos con los eventos de las particiones indicadas, que pasan a estar cargadas"""
+        eventos: List[Dict] = []
+        for clave in sorted(claves):
+            eventos.extend(self._leer_particion(clave))
+        eventos.sort(key=lambda e: e['id'])
+        self._cargadas = claves
+        return {'formato': FORMATO_DATOS, 'recursos': manifiesto['recursos'], 'eventos': eventos,
+                'restricciones': manifiesto['restricciones']}
+
+    def cargar(self) -> Optional[Tuple[Datos, List[Dict]]]:
+        self._manifiesto = None
+        manifiesto = self._leer_manifiesto()
+        if manifiesto is None:
+            return None
+        return self._datos(manifiesto, self._activas(manifiesto)), []
+
+    def cambios_externos(self) -> bool:
+        return firma_archivo(self.archivo_manifiesto) != self._firma
+
+    def refrescar(self) -> Optional[Tuple[Optional[Datos], List[Dict]]]:
+        if not self.cambios_externos():
+            return None
+        anterior = self._manifiesto
+        cargadas = self._cargadas
+        self._manifiesto = None
+        manifiesto = self._leer_manifiesto()
+        if manifiesto is None:
+            return None
+        if anterior is None or cargadas is None or manifiesto.get('particion') != anterior.get('particion'):
+            return self._datos(manifiesto, self._activas(manifiesto)), []
+
+        # Solo se releen las particiones en memoria cuyo crc cambió (o que
+        # desaparecieron) y las que entraron en la ventana activa
+        previas, actuales = anterior['particiones'], manifiesto['particiones']
+        cambiadas = {
+            clave for clave in cargadas
+            if clave not in actuales or clave not in previas
+            or actuales[clave].get('crc') != previas[clave].get('crc')
+        }
+        claves = cambiadas | (self._activas(manifiesto) - cargadas)
+        eventos: List[Dict] = []
+        for clave in sorted(claves & set(actuales)):
+            eventos.extend(self._leer_particion(clave))
+        self._cargadas = (cargadas | claves) & set(actuales)
+        return {'formato': FORMATO_DATOS, 'recursos': manifiesto['recursos'], 'eventos': eventos,
+                'restricciones': manifiesto['restricciones'],
+                'rangos': [self._rango(clave) for clave in sorted(claves)]}, []
+
+    def _rango(self, clave: str) -> Tuple[datetime, datetime]:
+        """Fechas [desde, hasta) que cubre una partición"""
+        if self.unidad == 'año':
+            año = int(clave)
+            return datetime(año, 1, 1), datetime(año + 1, 1, 1)
+        año, mes = map(int, clave.split('-'))
+        return datetime(año, mes, 1), datetime(año + mes // 12, mes % 12 + 1, 1)
+
+    @property
+    def historial_pendiente(self) -> bool:
+        manifiesto = self._manifiesto
+        return (manifiesto is not None and self._cargadas is not None
+                and any(clave not in self._cargadas for clave in manifiesto['particiones']))
+
+    def cargar_particiones(self, desde: Optional[datetime] = None,
+                           hasta: Optional[datetime] = None) -> List[Dict]:
+        manifiesto = self._manifiesto
+        if manifiesto is None or self._cargadas is None:
+            return []
+        elegidas = [
+            clave for clave, info in sorted(manifiesto['particiones'].items())
+            if clave not in self._cargadas
+            and (desde is None or info['fin_max'] >= desde.isoformat())
+            and (hasta is None or info['inicio_min'] <= hasta.isoformat())
+        ]
+        eventos: List[Dict] = []
+        for clave in elegidas:
+            eventos.extend(self._leer_particion(clave))
+        self._cargadas.update(elegidas)
+        return eventos
+
+    def guardar(self, datos: Datos) -> None:
+        por_clave: Dict[str, List[Dict]] = {}
+        for evento in datos.get('eventos', []):
+            por_clave.setdefault(self._clave(evento['inicio']), []).append(evento)
+
+        anterior = self._leer_manifiesto() or {'particiones': {}}
+        previas = anterior['particiones']
+        # Las particiones que el gestor no cargó no vienen en `datos` y se conservan;
+        # si no se cargó nada (migración, primera escritura) los datos lo reemplazan todo
+        if self._cargadas is None:
+            conservadas = set()
+        else:
+            conservadas = {clave for clave in previas if clave not in self._cargadas}
+        conservadas -= set(por_clave)
+
+        particiones = {clave: previas[clave] for clave in conservadas}
+        for clave, eventos in por_clave.items():
+            particiones[clave] = self._escribir_particion(clave, eventos, previas.get(clave))
+
+        manifiesto = {
+            'formato': FORMATO_DATOS,
+            'particion': self.unidad,
+            'recursos': datos.get('recursos', []),
+            'restricciones': datos.get('restricciones', []),
+            'particiones': dict(sorted(particiones.items()))
+        }
+        self._confirmar(manifiesto, set(previas) - set(particiones))
+        self._cargadas = set(por_clave)
+
+    def registrar(self, *registros: Dict) -> None:
+        manifiesto = self._leer_manifiesto()
+        if manifiesto is None:
+            raise RuntimeError("no hay manifiesto de particiones; falta una instantánea completa")
+
+        # Agrupar los registros por partición para reescribir cada una una sola vez
+        cambios: Dict[str, List[Dict]] = {}
+        for registro in registros:
+            if registro['op'] == 'crear_evento':
+                clave = self._clave(registro['evento']['inicio'])
+            elif registro['op'] in ('eliminar_evento', 'cambiar_estado'):
+                inicio = registro.get('inicio')
+                clave = self._clave(inicio) if inicio else self._buscar_particion(registro['id'])
+                if clave is None:
+                    continue
+            else:
+                continue
+            cambios.setdefault(clave, []).append(registro)
+
+        particiones = dict(manifiesto['particiones'])
+        for clave, lista in cambios.items():
+            eventos = {}
+            if clave in particiones:
+                eventos = {e['id']: e for e in self._leer_particion(clave)}
+            for registro in lista:
+                if registro['op'] == 'crear_evento':
+                    eventos[registro['evento']['id']] = registro['evento']
+                elif registro['op'] == 'eliminar_evento':
+                    eventos.pop(registro['id'], None)
+                elif registro['id'] in eventos:
+                    eventos[registro['id']] = dict(eventos[registro['id']], estado=registro['estado'])
+            resumen = self._escribir_particion(clave, list(eventos.values()), particiones.get(clave))
+            if resumen is None:
+                particiones.pop(clave, None)
+            else:
+                particiones[clave] = resumen
+                if self._cargadas is not None and clave not in manifiesto['particiones']:
+                    # Partición nueva: sus eventos ya están en memoria
+                    self._cargadas.add(clave)
+
+        self._confirmar(dict(manifiesto, particiones=dict(sorted(particiones.items()))),
+                        set(manifiesto['particiones']) - set(particiones))
+
+    def _buscar_particion(self, evento_id: int) -> Optional[str]:
+        """Partición que contiene un evento, leyéndolas una a una (registros sin fecha)"""
+        for clave in self._manifiesto['particiones']:
+            if any(e['id'] == evento_id for e in self._leer_particion(clave)):
+                return clave
+        return None
+
+    def estadisticas(self) -> Optional[Dict]:
+        manifiesto = self._manifiesto
+        if manifiesto is None:
+            return None
+        # Los resúmenes del manifiesto cubren también las particiones sin cargar
+        por_estado: Dict[str, List] = {}
+        for info in manifiesto['particiones'].values():
+            for estado, (cantidad, total) in info['estados'].items():
+                acumulado = por_estado.setdefault(estado, [0, 0.0])
+                acumulado[0] += cantidad
+                acumulado[1] += total
+        confirmados, ingresos = por_estado.get('confirmado', (0, 0.0))
+        return {
+            "total_eventos": sum(cantidad for cantidad, _ in por_estado.values()),
+            "eventos_confirmados": confirmados,
+            "eventos_pendientes": por_estado.get('pendiente', (0, 0.0))[0],
+            "eventos_completados": por_estado.get('completado', (0, 0.0))[0],
+            "ingresos_totales": ingresos,
+            "recursos_totales": len(manifiesto['recursos']),
+            "recursos_disponibles": sum(1 for r in manifiesto['recursos'] if r.get('disponible', True)),
+            "promedio_presupuesto": ingresos / confirmados if confirmados else 0
+        }
+
+
+BACKENDS = {
+    AlmacenamientoJSON.nombre: AlmacenamientoJSON,
+    AlmacenamientoSQLite.nombre: AlmacenamientoSQLite,
+    AlmacenamientoParticionado.nombre: AlmacenamientoParticionado,
+}
+
+def crear_almacenamiento(tipo: str, data_dir: str, umbral_compactacion: int) -> Almacenamiento:
+    """Crea el backend indicado por nombre ('json', 'sqlite' o 'particionado')"""
+    if tipo == AlmacenamientoJSON.nombre:
+        return AlmacenamientoJSON(data_dir, umbral_compactacion)
+    if tipo == AlmacenamientoSQLite.nombre:
+        return AlmacenamientoSQLite(data_dir)
+    if tipo == AlmacenamientoParticionado.nombre:
+        return AlmacenamientoParticionado(data_dir, ConfiguracionApp.PARTICION,
+                                          ConfiguracionApp.DIAS_VENTANA_ACTIVA)
+    raise ValueError(f"Almacenamiento desconocido: {tipo} (opciones: {', '.join(BACKENDS)})")
@@ -0,0 +1,172 @@
+# Índice invertido para la búsqueda de texto en eventos y recursos
+
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+_PALABRA = re.compile(r"\w+")
+
+# Palabras vacías del español (ya sin tildes); no aportan a la búsqueda
+PALABRAS_VACIAS = frozenset("""
+    a al algo ante con contra de del desde donde e el ella en entre era es esa ese esta este
+    fue ha hay la las le les lo los mas me mi mis muy ni no nos o os para pero por que se
+    sin sobre su sus te tu un una uno unos unas y ya
+""".split())
+
+# Peso de las palabras del nombre frente a las de la descripción
+PESO_NOMBRE = 2
+# Factor de puntuación cuando la palabra solo coincide por prefijo
+PESO_PREFIJO = 0.5
+# Longitud mínima de un término para buscarlo también como prefijo
+MIN_PREFIJO = 3
+# Máximo de palabras del vocabulario a las que se expande un prefijo
+MAX_EXPANSION = 50
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes ni diéresis ('Jardín' -> 'jardin')"""
+    descompuesto = unicodedata.normalize('NFKD', texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+def tokenizar(texto: str) -> List[str]:
+    """Palabras normalizadas del texto, sin palabras vacías"""
+    return [palabra for palabra in _PALABRA.findall(normalizar(texto)) if palabra not in PALABRAS_VACIAS]
+
+class IndiceBusqueda:
+    """
+    Índice invertido palabra -> {documento: frecuencia}
+
+    Los documentos son cualquier clave hashable (p. ej. ('evento', 12)). Junto
+    al índice se guarda el vocabulario ordenado, así que las palabras que
+    empiezan por un prefijo se localizan con bisect sin recorrerlo entero. Las
+    altas y bajas actualizan solo las palabras del documento.
+    """
+
+    __slots__ = ('_postings', '_documentos', '_vocabulario')
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._documentos: Dict[Hashable, Counter] = {}
+        self._vocabulario: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._documentos)
+
+    def agregar(self, clave: Hashable, nombre: str, descripcion: str = "") -> None:
+        """Indexa (o reindexa) un documento a partir de su nombre y descripción"""
+        self.quitar(clave)
+        frecuencias = Counter(tokenizar(descripcion))
+        for palabra in tokenizar(nombre):
+            frecuencias[palabra] += PESO_NOMBRE
+        if not frecuencias:
+            return
+
+        self._documentos[clave] = frecuencias
+        for palabra, frecuencia in frecuencias.items():
+            documentos = self._postings.get(palabra)
+            if documentos is None:
+                documentos = self._postings[palabra] = {}
+                insort(self._vocabulario, palabra)
+            documentos[clave] = frecuencia
+
+    def quitar(self, clave: Hashable) -> bool:
+        """Elimina un documento del índice; retorna False si no estaba"""
+        frecuencias = self._documentos.pop(clave, None)
+        if frecuencias is None:
+            return False
+        for palabra in frecuencias:
+            documentos = self._postings[palabra]
+            del documentos[clave]
+            if not documentos:
+                del self._postings[palabra]
+                del self._vocabulario[bisect_left(self._vocabulario, palabra)]
+        return True
+
+    def palabras_con_prefijo(self, prefijo: str, limite: Optional[int] = None) -> List[str]:
+        """Palabras del vocabulario que empiezan por el prefijo (hasta `limite`), en O(log V + k)"""
+        posicion = bisect_left(self._vocabulario, prefijo)
+        palabras = []
+        while posicion < len(self._vocabulario) and self._vocabulario[posicion].startswith(prefijo):
+            if limite is not None and len(palabras) >= limite:
+                break
+            palabras.append(self._vocabulario[posicion])
+            posicion += 1
+        return palabras
+
+    def _expandir(self, termino: str) -> List[str]:
+        """Palabras del índice con las que coincide un término de la consulta"""
+        if len(termino) < MIN_PREFIJO:
+            # Los términos muy cortos solo coinciden exactamente
+            return [termino] if termino in self._postings else []
+        # bisect deja la palabra exacta, si existe, la primera de la lista
+        return self.palabras_con_prefijo(termino, MAX_EXPANSION)
+
+    def buscar(self, consulta: str, limite: Optional[int] = 20,
+               admitidos: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Documentos que contienen todas las palabras de la consulta, por relevancia
+
+        Cada palabra de la consulta coincide con las palabras del índice que
+        empiezan por ella (las primeras MAX_EXPANSION en orden alfabético);
+        las de menos de MIN_PREFIJO letras solo coinciden exactamente. La
+        puntuación es tf-idf ((1 + log tf) · log(1 + N/df)), reducida por
+        PESO_PREFIJO cuando la coincidencia no es exacta.
+
+        Args:
+            consulta: Texto libre
+            limite: Máximo de resultados (None: todos)
+            admitidos: Filtro de claves; se aplica antes de puntuar y limitar
+
+        Returns:
+            Lista de (clave, puntuación) de mayor a menor puntuación
+        """
+        terminos = list(dict.fromkeys(tokenizar(consulta)))
+        if not terminos:
+            return []
+
+        # Primero se intersecan los conjuntos de documentos de cada término
+        # (operaciones de conjuntos) y solo se puntúan los que quedan
+        palabras_por_termino = [self._expandir(termino) for termino in terminos]
+        if not all(palabras_por_termino):
+            return []
+        conjuntos = [set().union(*(self._postings[palabra].keys() for palabra in palabras))
+                     for palabras in palabras_por_termino]
+        menor, *resto = sorted(conjuntos, key=len)
+        candidatos = menor.intersection(*resto)
+        if admitidos is not None:
+            candidatos = {clave for clave in candidatos if admitidos(clave)}
+
+        total = len(self._documentos)
+        puntuaciones = dict.fromkeys(candidatos, 0.0)
+        for termino, palabras, conjunto in zip(terminos, palabras_por_termino, conjuntos):
+            # Si todos los documentos del término son candidatos no hace falta filtrar
+            filtrar = len(conjunto) != len(candidatos)
+            mejores: Dict[Hashable, float] = {}
+            for palabra in palabras:
+                documentos = self._postings[palabra]
+                peso = math.log(1 + total / len(documentos))
+                if palabra != termino:
+                    peso *= PESO_PREFIJO
+                # Se recorre la lista más corta: la de la palabra o la de candidatos
+                if not filtrar:
+                    pares = documentos.items()
+                elif len(documentos) <= len(candidatos):
+                    pares = ((clave, f) for clave, f in documentos.items() if clave in puntuaciones)
+                else:
+                    pares = ((clave, documentos[clave]) for clave in candidatos if clave in documentos)
+                for clave, frecuencia in pares:
+                    valor = (1 + math.log(frecuencia)) * peso
+                    # Con varias palabras del mismo prefijo cuenta la mejor
+                    if valor > mejores.get(clave, 0.0):
+                        mejores[clave] = valor
+            for clave, valor in mejores.items():
+                puntuaciones[clave] += valor
+
+        resultados = puntuaciones.items()
+        if limite is None:
+            return sorted(resultados, key=itemgetter(1), reverse=True)
+        return nlargest(limite, resultados, key=itemgetter(1))
@@ -0,0 +1,356 @@
+# Índices temporales ordenados: calendario de reservas de un recurso e inicios de eventos
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+import heapq
+import pickle
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+Reserva = Tuple[int, datetime, datetime]
+Intervalo = Tuple[datetime, datetime]
+
+# Las fechas se guardan como microsegundos desde la época (fechas sin zona horaria)
+_EPOCA = datetime(1970, 1, 1)
+_MICROSEGUNDO = timedelta(microseconds=1)
+
+def a_marca(momento: datetime) -> int:
+    """Convierte una fecha en microsegundos desde la época"""
+    return (momento - _EPOCA) // _MICROSEGUNDO
+
+def desde_marca(marca: int) -> datetime:
+    """Convierte microsegundos desde la época en fecha"""
+    return _EPOCA + timedelta(microseconds=marca)
+
+class CalendarioRecurso:
+    """
+    Reservas de un recurso ordenadas por fecha de inicio
+
+    Las reservas se guardan en columnas paralelas array('q') (ids, inicios,
+    fines) en lugar de tuplas con datetimes. Junto a ellas se guarda el máximo
+    acumulado de las fechas de fin. Esa columna es monótona, así que una
+    consulta de solapamiento se resuelve con dos búsquedas binarias aunque
+    haya reservas solapadas.
+
+    Cada reserva ocupa un número de unidades (1 por defecto). La carga de un
+    intervalo se obtiene con un barrido sobre las reservas solapadas, que el
+    índice localiza sin recorrer el resto del calendario.
+    """
+
+    __slots__ = ('_ids', '_inicios', '_fines', '_fin_max', '_unidades')
+
+    def __init__(self, reservas: Iterable[Tuple] = ()):
+        # Las reservas pueden traer un cuarto elemento con las unidades
+        self._unidades: Dict[int, int] = {}
+        filas = []
+        for evento_id, inicio, fin, *resto in reservas:
+            filas.append((a_marca(inicio), a_marca(fin), evento_id))
+            if resto and resto[0] != 1:
+                self._unidades[evento_id] = resto[0]
+        filas.sort(key=lambda f: f[0])
+
+        self._ids = array('q', [f[2] for f in filas])
+        self._inicios = array('q', [f[0] for f in filas])
+        self._fines = array('q', [f[1] for f in filas])
+        self._fin_max = array('q')
+
+        acumulado = None
+        for fin in self._fines:
+            if acumulado is None or fin > acumulado:
+                acumulado = fin
+            self._fin_max.append(acumulado)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __reduce_ex__(self, protocolo):
+        # Con el protocolo 5 las columnas viajan como búferes, sin copiarlas al pickle
+        if protocolo < 5:
+            return super().__reduce_ex__(protocolo)
+        columnas = [pickle.PickleBuffer(c) for c in (self._ids, self._inicios, self._fines, self._fin_max)]
+        return _calendario_desde_columnas, (*columnas, self._unidades)
+
+    def __iter__(self) -> Iterator[Reserva]:
+        for evento_id, inicio, fin in zip(self._ids, self._inicios, self._fines):
+            yield evento_id, desde_marca(inicio), desde_marca(fin)
+
+    def reserva(self, posicion: int) -> Reserva:
+        """Reserva en la posición dada, como tupla (evento_id, inicio, fin)"""
+        return (self._ids[posicion], desde_marca(self._inicios[posicion]),
+                desde_marca(self._fines[posicion]))
+
+    def _rango_solapado(self, inicio: int, fin: int) -> Tuple[int, int]:
+        """Posiciones [desde, hasta) que pueden solaparse con [inicio, fin)"""
+        return bisect_right(self._fin_max, inicio), bisect_left(self._inicios, fin)
+
+    def hay_solapamiento(self, inicio: datetime, fin: datetime) -> bool:
+        """Indica si alguna reserva se solapa con [inicio, fin) en O(log n)"""
+        posicion = bisect_left(self._inicios, a_marca(fin))
+        return posicion > 0 and self._fin_max[posicion - 1] > a_marca(inicio)
+
+    def solapadas(self, inicio: datetime, fin: datetime) -> List[Reserva]:
+        """Devuelve las reservas que se solapan con [inicio, fin), ordenadas por inicio"""
+        marca_inicio = a_marca(inicio)
+        desde, hasta = self._rango_solapado(marca_inicio, a_marca(fin))
+        return [self.reserva(i) for i in range(desde, hasta) if self._fines[i] > marca_inicio]
+
+    def columnas(self, desde: datetime, hasta: datetime) -> Tuple[array, array, List[int]]:
+        """
+        Columnas (inicios, fines, unidades) de las reservas candidatas a solaparse
+        con [desde, hasta), en marcas de microsegundos
+
+        Pensado para volcados masivos (p. ej. a NumPy); puede incluir alguna
+        reserva que termina antes de `desde`, que el llamador debe descartar.
+        """
+        primera, ultima = self._rango_solapado(a_marca(desde), a_marca(hasta))
+        unidades = [self._unidades.get(evento_id, 1) for evento_id in self._ids[primera:ultima]]
+        return self._inicios[primera:ultima], self._fines[primera:ultima], unidades
+
+    def unidades_de(self, evento_id: int) -> int:
+        """Unidades que ocupa la reserva de un evento"""
+        return self._unidades.get(evento_id, 1)
+
+    def _barrido(self, desde: int, hasta: int) -> List[Tuple[int, int]]:
+        """Puntos (marca, variación de carga) de las reservas del rango, ordenados"""
+        puntos = []
+        primera, ultima = self._rango_solapado(desde, hasta)
+        for i in range(primera, ultima):
+            if self._fines[i] <= desde:
+                continue
+            unidades = self._unidades.get(self._ids[i], 1)
+            puntos.append((max(self._inicios[i], desde), unidades))
+            puntos.append((min(self._fines[i], hasta), -unidades))
+        # Con intervalos semiabiertos, las salidas van antes que las entradas simultáneas
+        puntos.sort()
+        return puntos
+
+    def carga_maxima(self, desde: datetime, hasta: datetime) -> int:
+        """Máximo de unidades ocupadas a la vez dentro de [desde, hasta)"""
+        carga = maximo = 0
+        for _, variacion in self._barrido(a_marca(desde), a_marca(hasta)):
+            carga += variacion
+            if carga > maximo:
+                maximo = carga
+        return maximo
+
+    def hay_capacidad(self, inicio: datetime, fin: datetime,
+                      unidades: int, capacidad: int) -> bool:
+        """Indica si caben `unidades` más en [inicio, fin) sin superar la capacidad"""
+        if unidades > capacidad:
+            return False
+        if not self.hay_solapamiento(inicio, fin):
+            return True
+        if capacidad == 1:
+            return False
+        return self.carga_maxima(inicio, fin) + unidades <= capacidad
+
+    def intervalos_saturados(self, desde: datetime, hasta: datetime,
+                             unidades: int, capacidad: int) -> List[Intervalo]:
+        """Intervalos de [desde, hasta) en los que no quedan `unidades` libres"""
+        if unidades > capacidad:
+            return [(desde, hasta)]
+        if capacidad == 1:
+            return [(inicio, fin) for _, inicio, fin in self.solapadas(desde, hasta)]
+
+        umbral = capacidad - unidades
+        bloques: List[Intervalo] = []
+        carga = 0
+        apertura = None
+        for momento, variacion in self._barrido(a_marca(desde), a_marca(hasta)):
+            carga += variacion
+            if apertura is None and carga > umbral:
+                apertura = momento
+            elif apertura is not None and carga <= umbral:
+                if momento > apertura:
+                    bloques.append((desde_marca(apertura), desde_marca(momento)))
+                apertura = None
+        return bloques
+
+    def agregar(self, evento_id: int, inicio: datetime, fin: datetime,
+                unidades: int = 1) -> None:
+        """Inserta una reserva manteniendo el orden y el máximo acumulado"""
+        if unidades != 1:
+            self._unidades[evento_id] = unidades
+        marca_inicio, marca_fin = a_marca(inicio), a_marca(fin)
+        posicion = bisect_right(self._inicios, marca_inicio)
+        anterior = self._fin_max[posicion - 1] if posicion > 0 else marca_fin
+
+        self._ids.insert(posicion, evento_id)
+        self._inicios.insert(posicion, marca_inicio)
+        self._fines.insert(posicion, marca_fin)
+        self._fin_max.insert(posicion, max(anterior, marca_fin))
+
+        # Solo cambian los máximos posteriores que eran menores que el nuevo fin
+        for i in range(posicion + 1, len(self._fin_max)):
+            if self._fin_max[i] >= marca_fin:
+                break
+            self._fin_max[i] = marca_fin
+
+    def quitar(self, evento_id: int, inicio: Optional[datetime] = None) -> bool:
+        """
+        Elimina la reserva de un evento; retorna False si no existía
+
+        Si se conoce el inicio de la reserva se localiza por búsqueda binaria.
+        """
+        posicion = -1
+        if inicio is not None:
+            marca_inicio = a_marca(inicio)
+            i = bisect_left(self._inicios, marca_inicio)
+            while i < len(self._ids) and self._inicios[i] == marca_inicio:
+                if self._ids[i] == evento_id:
+                    posicion = i
+                    break
+                i += 1
+        if posicion < 0:
+            try:
+                posicion = self._ids.index(evento_id)
+            except ValueError:
+                return False
+
+        self._unidades.pop(evento_id, None)
+        del self._ids[posicion]
+        del self._inicios[posicion]
+        del self._fines[posicion]
+        del self._fin_max[posicion]
+
+        # Recalcular máximos hasta que coincidan de nuevo con los existentes
+        acumulado = self._fin_max[posicion - 1] if posicion > 0 else None
+        for i in range(posicion, len(self._fin_max)):
+            fin = self._fines[i]
+            if acumulado is None or fin > acumulado:
+                acumulado = fin
+            if self._fin_max[i] == acumulado:
+                break
+            self._fin_max[i] = acumulado
+        return True
+
+
+def _calendario_desde_columnas(ids, inicios, fines, fin_max, unidades) -> CalendarioRecurso:
+    """Reconstruye un calendario a partir de los búferes de sus columnas"""
+    calendario = CalendarioRecurso.__new__(CalendarioRecurso)
+    for nombre, buffer in (('_ids', ids), ('_inicios', inicios), ('_fines', fines), ('_fin_max', fin_max)):
+        columna = array('q')
+        columna.frombytes(buffer)
+        setattr(calendario, nombre, columna)
+    calendario._unidades = unidades
+    return calendario
+
+
+class IndiceInicios:
+    """
+    IDs de eventos ordenados por fecha de inicio
+
+    Como en CalendarioRecurso, se guardan dos columnas array('q') paralelas
+    (inicios en microsegundos e ids) que se mantienen ordenadas con bisect. Una
+    consulta por rango cuesta O(log n + k) en lugar de recorrer todos los eventos.
+    """
+
+    __slots__ = ('_inicios', '_ids')
+
+    def __init__(self, eventos: Iterable[Tuple[int, datetime]] = ()):
+        filas = sorted((a_marca(inicio), evento_id) for evento_id, inicio in eventos)
+        self._inicios = array('q', [f[0] for f in filas])
+        self._ids = array('q', [f[1] for f in filas])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def agregar(self, evento_id: int, inicio: datetime) -> None:
+        """Inserta un evento manteniendo el orden por inicio"""
+        marca = a_marca(inicio)
+        posicion = bisect_right(self._inicios, marca)
+        self._inicios.insert(posicion, marca)
+        self._ids.insert(posicion, evento_id)
+
+    def quitar(self, evento_id: int, inicio: datetime) -> bool:
+        """Elimina un evento localizándolo por su inicio; retorna False si no estaba"""
+        marca = a_marca(inicio)
+        i = bisect_left(self._inicios, marca)
+        while i < len(self._ids) and self._inicios[i] == marca:
+            if self._ids[i] == evento_id:
+                del self._inicios[i]
+                del self._ids[i]
+                return True
+            i += 1
+        return False
+
+    def _posiciones(self, desde: Optional[datetime], hasta: Optional[datetime]) -> Tuple[int, int]:
+        """Posiciones [primera, ultima) de los eventos que empiezan en [desde, hasta]"""
+        primera = 0 if desde is None else bisect_left(self._inicios, a_marca(desde))
+        ultima = len(self._ids) if hasta is None else bisect_right(self._inicios, a_marca(hasta))
+        return primera, max(primera, ultima)
+
+    def contar(self, desde: Optional[datetime] = None, hasta: Optional[datetime] = None) -> int:
+        """Número de eventos que empiezan en [desde, hasta], en O(log n)"""
+        primera, ultima = self._posiciones(desde, hasta)
+        return ultima - primera
+
+    def en_rango(self, desde: Optional[datetime] = None,
+                 hasta: Optional[datetime] = None) -> List[int]:
+        """IDs de los eventos que empiezan en [desde, hasta], ordenados por inicio"""
+        primera, ultima = self._posiciones(desde, hasta)
+        return self._ids[primera:ultima].tolist()
+
+
+class VistaReservas(Sequence):
+    """
+    Vista de solo lectura de un calendario como lista de tuplas
+
+    Mantiene el acceso histórico `recurso.eventos_asignados` sin guardar una
+    tupla con datetimes por reserva: las tuplas se construyen al leerlas.
+    """
+
+    __slots__ = ('_calendario',)
+
+    def __init__(self, calendario: CalendarioRecurso):
+        self._calendario = calendario
+
+    def __len__(self) -> int:
+        return len(self._calendario)
+
+    def __iter__(self) -> Iterator[Reserva]:
+        return iter(self._calendario)
+
+    def __getitem__(self, indice: Union[int, slice]):
+        if isinstance(indice, slice):
+            return [self._calendario.reserva(i) for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("índice de reserva fuera de rango")
+        return self._calendario.reserva(indice)
+
+    def __eq__(self, otro) -> bool:
+        if isinstance(otro, (VistaReservas, list, tuple)):
+            return list(self) == list(otro)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def huecos_libres(ocupaciones: Iterable[List[Intervalo]], desde: datetime,
+                  hasta: datetime) -> Iterator[Intervalo]:
+    """
+    Recorre en orden los intervalos libres comunes a varios calendarios
+
+    Args:
+        ocupaciones: Intervalos ocupados de cada recurso, cada lista ordenada por inicio
+        desde: Inicio del rango a explorar
+        hasta: Fin del rango a explorar
+
+    Returns:
+        Iterador de tuplas (inicio, fin) con los huecos maximales dentro del rango
+    """
+    cursor = desde
+    for inicio, fin in heapq.merge(*ocupaciones):
+        if inicio >= hasta:
+            break
+        if inicio > cursor:
+            yield cursor, inicio
+        # Saltar directamente al final de la reserva que bloquea
+        if fin > cursor:
+            cursor = fin
+    if cursor < hasta:
+        yield cursor, hasta
@@ -0,0 +1,87 @@
+# Comandos de administración: python -m Logic.cli <comando>
+
+import argparse
+import sys
+from typing import List, Optional
+from .almacenamiento import BACKENDS, crear_almacenamiento
+from .config import ConfiguracionApp
+from .wedding_manager import DreamWeddingPlanner
+from .data_handler import DataHandler
+from .columnar import FORMATOS_COLUMNARES
+
+def comando_migrar(args: argparse.Namespace) -> int:
+    """Copia los datos de un backend de almacenamiento a otro"""
+    if args.desde == args.hacia:
+        print("El origen y el destino deben ser distintos")
+        return 1
+
+    planner = DreamWeddingPlanner(args.data_dir, almacenamiento=args.desde)
+    destino = crear_almacenamiento(args.hacia, args.data_dir, ConfiguracionApp.UMBRAL_COMPACTACION)
+    exito, mensaje = planner.migrar_almacenamiento(destino)
+    destino.cerrar()
+    print(mensaje)
+    return 0 if exito else 1
+
+def comando_exportar(args: argparse.Namespace) -> int:
+    """Exporta los datos a CSV o a un formato columnar"""
+    planner = DreamWeddingPlanner(args.data_dir, almacenamiento=args.almacenamiento)
+    if args.formato == "csv":
+        exito = DataHandler.exportar_datos_csv(planner, args.salida, compresion=args.compresion)
+    else:
+        exito = DataHandler.exportar_datos_columnar(planner, args.salida, args.formato)
+    planner.cerrar()
+    if exito:
+        print(f"Exportados {len(planner.eventos)} eventos y {len(planner.recursos)} recursos a {args.salida}_*")
+    return 0 if exito else 1
+
+def comando_importar(args: argparse.Namespace) -> int:
+    """Reemplaza eventos y recursos por los de una exportación columnar"""
+    planner = DreamWeddingPlanner(args.data_dir, almacenamiento=args.almacenamiento)
+    exito = DataHandler.importar_datos_columnar(args.entrada, planner, args.formato)
+    planner.cerrar()
+    if exito:
+        print(f"Importados {len(planner.eventos)} eventos y {len(planner.recursos)} recursos desde {args.entrada}_*")
+    return 0 if exito else 1
+
+def crear_parser() -> argparse.ArgumentParser:
+    """Parser con los subcomandos disponibles"""
+    parser = argparse.ArgumentParser(prog="python -m Logic.cli",
+                                     description="Administración de Dream Wedding Planner")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    migrar = subparsers.add_parser("migrar", help="Migra los datos entre backends de almacenamiento")
+    migrar.add_argument("--desde", choices=sorted(BACKENDS), default="json",
+                        help="Backend de origen (por defecto: json)")
+    migrar.add_argument("--hacia", choices=sorted(BACKENDS), default="sqlite",
+                        help="Backend de destino (por defecto: sqlite)")
+    migrar.add_argument("--data-dir", default="data", help="Carpeta de datos (por defecto: data)")
+    migrar.set_defaults(funcion=comando_migrar)
+
+    exportar = subparsers.add_parser("exportar", help="Exporta los datos a CSV, Parquet, Feather o pickle")
+    exportar.add_argument("--salida", required=True, help="Prefijo de los archivos generados")
+    exportar.add_argument("--formato", choices=["csv", *FORMATOS_COLUMNARES], default=None,
+                          help="Formato de salida (por defecto: Parquet si hay pyarrow, si no pickle)")
+    exportar.add_argument("--compresion", choices=["gzip", "lzma"], default=None,
+                          help="Compresión de los CSV")
+    exportar.add_argument("--data-dir", default="data", help="Carpeta de datos (por defecto: data)")
+    exportar.add_argument("--almacenamiento", choices=sorted(BACKENDS), default=None,
+                          help="Backend de almacenamiento (por defecto: el de la configuración)")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    importar = subparsers.add_parser("importar", help="Importa eventos y recursos de una exportación columnar")
+    importar.add_argument("--entrada", required=True, help="Prefijo de los archivos a importar")
+    importar.add_argument("--formato", choices=list(FORMATOS_COLUMNARES), default=None,
+                          help="Formato de entrada (por defecto se detecta)")
+    importar.add_argument("--data-dir", default="data", help="Carpeta de datos (por defecto: data)")
+    importar.add_argument("--almacenamiento", choices=sorted(BACKENDS), default=None,
+                          help="Backend de almacenamiento (por defecto: el de la configuración)")
+    importar.set_defaults(funcion=comando_importar)
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Lectura y decodificación compartida de los datos JSON
+
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .models import (Recurso, Evento, Restriccion, TipoBoda, EstadoEvento, TipoRecurso,
+                     TipoRestriccion, TIPOS_BODA, ESTADOS_EVENTO, TIPOS_RECURSO)
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el módulo json estándar
+    orjson = None
+
+ORJSON_DISPONIBLE = orjson is not None
+
+TIPOS_RESTRICCION = {t.value: t for t in TipoRestriccion}
+
+# Versión del formato en disco. La 1 repetía cada reserva en los recursos
+# ('eventos_asignados'); la 2 solo la guarda en el evento y los calendarios
+# se reconstruyen al cargar.
+FORMATO_DATOS = 2
+
+def decodificar_json(contenido: bytes):
+    """Convierte bytes JSON en objetos Python con el parser más rápido disponible"""
+    if orjson is not None:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+def leer_json(archivo: str):
+    """Lee un archivo JSON completo"""
+    with open(archivo, 'rb') as f:
+        return decodificar_json(f.read())
+
+def recurso_desde_dict(r: Dict, reservas: Optional[List[Tuple]] = None) -> Recurso:
+    """
+    Construye un recurso a partir de su diccionario JSON
+
+    Las reservas se toman de `reservas` o, en el formato 1, de 'eventos_asignados'
+    """
+    if reservas is None:
+        # Las fechas de las reservas se convierten ya: el calendario las indexa al crearse
+        reservas = [
+            (eid, datetime.fromisoformat(inicio), datetime.fromisoformat(fin), *unidades)
+            for eid, inicio, fin, *unidades in r.get('eventos_asignados', [])
+        ]
+    return Recurso(
+        id=r['id'],
+        nombre=r['nombre'],
+        tipo=TIPOS_RECURSO.get(r['tipo'], TipoRecurso.PERSONAL),
+        capacidad=r.get('capacidad', 1),
+        precio=r.get('precio', 0.0),
+        disponible=r.get('disponible', True),
+        descripcion=r.get('descripcion', ''),
+        eventos_asignados=reservas
+    )
+
+def evento_desde_dict(e: Dict) -> Evento:
+    """
+    Construye un evento a partir de su diccionario JSON
+
+    Los enums se resuelven con las tablas de búsqueda en lugar de sus
+    constructores; Evento valida el orden de las fechas.
+    """
+    fecha_creacion = e.get('fecha_creacion')
+    return Evento(
+        id=e['id'],
+        nombre=e['nombre'],
+        inicio=datetime.fromisoformat(e['inicio']),
+        fin=datetime.fromisoformat(e['fin']),
+        recursos_solicitados=e['recursos_solicitados'],
+        descripcion=e.get('descripcion', ''),
+        tipo_boda=TIPOS_BODA.get(e.get('tipo_boda'), TipoBoda.PERSONALIZADA),
+        presupuesto=e.get('presupuesto', 0.0),
+        estado=ESTADOS_EVENTO.get(e.get('estado'), EstadoEvento.PENDIENTE),
+        num_invitados=e.get('num_invitados', 0),
+        fecha_creacion=datetime.fromisoformat(fecha_creacion) if fecha_creacion else datetime.now(),
+        unidades_solicitadas={int(rid): n for rid, n in e.get('unidades_solicitadas', {}).items()}
+    )
+
+def restriccion_desde_dict(r: Dict) -> Restriccion:
+    """Construye una restricción a partir de su diccionario JSON"""
+    return Restriccion(
+        tipo=TIPOS_RESTRICCION.get(r['tipo'], TipoRestriccion.EXCLUSION),
+        recursos_involucrados=r['recursos_involucrados'],
+        descripcion=r['descripcion']
+    )
+
+def reservas_desde_eventos(eventos: List[Evento]) -> Dict[int, List[Tuple]]:
+    """Reservas (evento_id, inicio, fin, unidades) de cada recurso, deducidas de los eventos"""
+    reservas: Dict[int, List[Tuple]] = {}
+    for evento in eventos:
+        # Las fechas se leen una vez por evento, no una vez por recurso
+        inicio, fin = evento.inicio, evento.fin
+        for recurso_id in evento.recursos_solicitados:
+            reservas.setdefault(recurso_id, []).append(
+                (evento.id, inicio, fin, evento.unidades_solicitadas.get(recurso_id, 1))
+            )
+    return reservas
+
+def codificar_datos(recursos: List[Recurso], eventos: List[Evento],
+                    restricciones: List[Restriccion]) -> Dict:
+    """Convierte los modelos al diccionario del formato normalizado"""
+    return {
+        'formato': FORMATO_DATOS,
+        'recursos': [r.to_dict(incluir_reservas=False) for r in recursos],
+        'eventos': [e.to_dict() for e in eventos],
+        'restricciones': [r.to_dict() for r in restricciones]
+    }
+
+def decodificar_datos(datos: Dict) -> Tuple[List[Recurso], List[Evento], List[Restriccion]]:
+    """Convierte el diccionario de datos completo (formato 1 o 2) en listas de modelos"""
+    formato = datos.get('formato', 1)
+    if formato > FORMATO_DATOS:
+        raise ValueError(f"Formato de datos {formato} no soportado (máximo {FORMATO_DATOS})")
+
+    eventos = [evento_desde_dict(e) for e in datos.get('eventos', [])]
+    if formato >= 2:
+        reservas = reservas_desde_eventos(eventos)
+        recursos = [recurso_desde_dict(r, reservas.get(r['id'], [])) for r in datos.get('recursos', [])]
+    else:
+        recursos = [recurso_desde_dict(r) for r in datos.get('recursos', [])]
+    restricciones = [restriccion_desde_dict(r) for r in datos.get('restricciones', [])]
+    return recursos, eventos, restricciones
+
+def cargar_archivo(archivo: str) -> Tuple[List[Recurso], List[Evento], List[Restriccion], Dict[str, float]]:
+    """
+    Lee y decodifica un archivo de datos JSON
+
+    Returns:
+        Tupla (recursos, eventos, restricciones, tiempos) con los segundos
+        empleados en 'lectura', 'decodificacion' y 'total' (las mismas
+        fases que planner.tiempos_carga muestra en la barra lateral)
+    """
+    comienzo = time.perf_counter()
+    datos = leer_json(archivo)
+    leido = time.perf_counter()
+    recursos, eventos, restricciones = decodificar_datos(datos)
+    terminado = time.perf_counter()
+    tiempos = {
+        'lectura': leido - comienzo,
+        'decodificacion': terminado - leido,
+        'total': terminado - comienzo
+    }
+    return recursos, eventos, restricciones, tiempos
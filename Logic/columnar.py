@@ -0,0 +1,151 @@
+# Exportación e importación columnar (Parquet/Feather/pickle) con pandas
+
+import os
+from typing import Dict, List, Optional
+from .models import Recurso, Evento, Restriccion, EstadoEvento, TipoBoda, TipoRecurso
+from .codec import FORMATO_DATOS
+
+try:
+    import pandas as pd
+except ImportError:  # pandas es opcional: sin él solo hay exportación CSV
+    pd = None
+
+try:
+    import pyarrow  # noqa: F401  (motor de Parquet y Feather para pandas)
+except ImportError:
+    pyarrow = None
+
+PANDAS_DISPONIBLE = pd is not None
+PYARROW_DISPONIBLE = pyarrow is not None
+
+# Formato -> extensión; Parquet y Feather necesitan pyarrow, pickle solo pandas
+FORMATOS_COLUMNARES = {'parquet': '.parquet', 'feather': '.feather', 'pickle': '.pkl'}
+TABLAS = ('eventos', 'recursos', 'asignaciones')
+
+def formato_por_defecto() -> str:
+    """Parquet si hay pyarrow; si no, pickle de pandas"""
+    return 'parquet' if PYARROW_DISPONIBLE else 'pickle'
+
+def _validar_formato(formato: str) -> None:
+    if not PANDAS_DISPONIBLE:
+        raise RuntimeError("La exportación columnar requiere pandas (pip install pandas)")
+    if formato not in FORMATOS_COLUMNARES:
+        raise ValueError(f"Formato desconocido: {formato} (opciones: {', '.join(FORMATOS_COLUMNARES)})")
+    if formato != 'pickle' and not PYARROW_DISPONIBLE:
+        raise RuntimeError(f"El formato {formato} requiere pyarrow (pip install pyarrow)")
+
+def _categorias(enum) -> List[str]:
+    return [miembro.value for miembro in enum]
+
+def tablas_desde_modelos(recursos: List[Recurso], eventos: List[Evento]) -> Dict[str, "pd.DataFrame"]:
+    """
+    Construye los DataFrames de eventos, recursos y asignaciones
+
+    Las fechas quedan como datetime64 y estado, tipo_boda y tipo como
+    categorías con todos los valores posibles de su enum.
+    """
+    tabla_eventos = pd.DataFrame({
+        'id': pd.array([e.id for e in eventos], dtype='int64'),
+        'nombre': pd.array([e.nombre for e in eventos], dtype='string'),
+        'inicio': pd.to_datetime([e.inicio for e in eventos]),
+        'fin': pd.to_datetime([e.fin for e in eventos]),
+        'descripcion': pd.array([e.descripcion for e in eventos], dtype='string'),
+        'tipo_boda': pd.Categorical([e.tipo_boda.value for e in eventos], categories=_categorias(TipoBoda)),
+        'presupuesto': pd.array([e.presupuesto for e in eventos], dtype='float64'),
+        'estado': pd.Categorical([e.estado.value for e in eventos], categories=_categorias(EstadoEvento)),
+        'num_invitados': pd.array([e.num_invitados for e in eventos], dtype='int64'),
+        'fecha_creacion': pd.to_datetime([e.fecha_creacion for e in eventos]),
+    })
+    tabla_recursos = pd.DataFrame({
+        'id': pd.array([r.id for r in recursos], dtype='int64'),
+        'nombre': pd.array([r.nombre for r in recursos], dtype='string'),
+        'tipo': pd.Categorical([r.tipo.value for r in recursos], categories=_categorias(TipoRecurso)),
+        'capacidad': pd.array([r.capacidad for r in recursos], dtype='int64'),
+        'precio': pd.array([r.precio for r in recursos], dtype='float64'),
+        'disponible': pd.array([r.disponible for r in recursos], dtype='bool'),
+        'descripcion': pd.array([r.descripcion for r in recursos], dtype='string'),
+    })
+
+    # Una fila por (evento, recurso), como en el formato normalizado
+    filas = [
+        (e.id, recurso_id, posicion, e.inicio, e.fin, e.unidades_solicitadas.get(recurso_id, 1))
+        for e in eventos
+        for posicion, recurso_id in enumerate(e.recursos_solicitados)
+    ]
+    tabla_asignaciones = pd.DataFrame(
+        filas, columns=['evento_id', 'recurso_id', 'posicion', 'inicio', 'fin', 'unidades']
+    ).astype({'evento_id': 'int64', 'recurso_id': 'int64', 'posicion': 'int64', 'unidades': 'int64',
+              'inicio': 'datetime64[us]', 'fin': 'datetime64[us]'})
+
+    return {'eventos': tabla_eventos, 'recursos': tabla_recursos, 'asignaciones': tabla_asignaciones}
+
+def rutas_tablas(prefijo: str, formato: str) -> Dict[str, str]:
+    """Rutas de los archivos de cada tabla: <prefijo>_<tabla><extensión>"""
+    return {tabla: f"{prefijo}_{tabla}{FORMATOS_COLUMNARES[formato]}" for tabla in TABLAS}
+
+def detectar_formato(prefijo: str) -> Optional[str]:
+    """Formato de una exportación existente, según las extensiones presentes"""
+    for formato in FORMATOS_COLUMNARES:
+        if all(os.path.exists(ruta) for ruta in rutas_tablas(prefijo, formato).values()):
+            return formato
+    return None
+
+def escribir_tablas(tablas: Dict[str, "pd.DataFrame"], prefijo: str, formato: str) -> Dict[str, str]:
+    """Escribe cada tabla en su archivo y retorna las rutas"""
+    _validar_formato(formato)
+    rutas = rutas_tablas(prefijo, formato)
+    for tabla, ruta in rutas.items():
+        if formato == 'parquet':
+            tablas[tabla].to_parquet(ruta, index=False)
+        elif formato == 'feather':
+            tablas[tabla].to_feather(ruta)
+        else:
+            tablas[tabla].to_pickle(ruta)
+    return rutas
+
+def leer_tablas(prefijo: str, formato: Optional[str] = None) -> Dict[str, "pd.DataFrame"]:
+    """
+    Lee una exportación columnar como DataFrames (con sus tipos originales)
+
+    Args:
+        prefijo: Prefijo usado al exportar
+        formato: 'parquet', 'feather' o 'pickle'; por defecto se detecta
+    """
+    formato = formato or detectar_formato(prefijo)
+    if formato is None:
+        raise FileNotFoundError(f"No hay una exportación columnar completa con el prefijo {prefijo}")
+    _validar_formato(formato)
+    lectores = {'parquet': pd.read_parquet, 'feather': pd.read_feather, 'pickle': pd.read_pickle}
+    return {tabla: lectores[formato](ruta) for tabla, ruta in rutas_tablas(prefijo, formato).items()}
+
+def datos_desde_tablas(tablas: Dict[str, "pd.DataFrame"],
+                       restricciones: List[Restriccion]) -> Dict:
+    """Convierte las tablas al diccionario del formato normalizado para decodificar_datos()"""
+    solicitados: Dict[int, List[int]] = {}
+    unidades: Dict[int, Dict[str, int]] = {}
+    asignaciones = tablas['asignaciones'].sort_values(['evento_id', 'posicion'])
+    for evento_id, recurso_id, n in zip(asignaciones['evento_id'].tolist(),
+                                        asignaciones['recurso_id'].tolist(),
+                                        asignaciones['unidades'].tolist()):
+        solicitados.setdefault(evento_id, []).append(recurso_id)
+        if n != 1:
+            unidades.setdefault(evento_id, {})[str(recurso_id)] = n
+
+    eventos = tablas['eventos']
+    columnas = {col: eventos[col].tolist() for col in eventos.columns}
+    columnas['inicio'] = [t.isoformat() for t in eventos['inicio']]
+    columnas['fin'] = [t.isoformat() for t in eventos['fin']]
+    columnas['fecha_creacion'] = [t.isoformat() for t in eventos['fecha_creacion']]
+    lista_eventos = []
+    for fila in zip(*columnas.values()):
+        evento = dict(zip(columnas.keys(), fila))
+        evento['recursos_solicitados'] = solicitados.get(evento['id'], [])
+        evento['unidades_solicitadas'] = unidades.get(evento['id'], {})
+        lista_eventos.append(evento)
+
+    return {
+        'formato': FORMATO_DATOS,
+        'recursos': tablas['recursos'].astype({'tipo': 'object'}).to_dict('records'),
+        'eventos': lista_eventos,
+        'restricciones': [r.to_dict() for r in restricciones]
+    }
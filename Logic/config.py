@@ -67,6 +67,32 @@ class ConfiguracionApp:
     MAX_INVITADOS = 500
     IMPUESTOS = 16.0
     DEPOSITO_CONFIRMACION = 30.0
+    # Registros del diario de cambios antes de compactarlo en una instantánea
+    UMBRAL_COMPACTACION = 200
+    # Backend de persistencia: "json" (instantánea + diario), "sqlite" o "particionado"
+    ALMACENAMIENTO = "json"
+    # Backend particionado: un archivo de eventos por "mes" o por "año"; al arrancar
+    # solo se cargan las particiones con eventos de los últimos días indicados o futuros
+    PARTICION = "mes"
+    DIAS_VENTANA_ACTIVA = 31
+    # Segundos que se agrupan los cambios antes de guardarlos en segundo plano
+    # (sin COORDINAR_PROCESOS; con ella cada cambio se escribe al confirmarse)
+    ESPERA_GUARDADO = 0.5
+    # Confirmar cada cambio bajo un cerrojo entre procesos (weddings.lock) si la
+    # versión de los datos no avanzó; si avanzó, se sincroniza y se valida de nuevo.
+    # Compromiso: la confirmación tiene que saber si hubo conflicto antes de
+    # responder, así que cada cambio se escribe (y se hace fsync) en el momento,
+    # sin la espera de ESPERA_GUARDADO. Desactivada, las escrituras se agrupan en
+    # segundo plano pero dos procesos que escriban a la vez pueden pisarse.
+    # Activarla si varios procesos (varias instancias de la app, la CLI mientras
+    # la app corre) modifican los mismos datos.
+    COORDINAR_PROCESOS = False
+    # Intentos optimistas de validar y guardar un cambio; tras ellos se valida con el cerrojo tomado
+    INTENTOS_ESCRITURA = 3
+    # Depuración: comparar las estadísticas incrementales con un recálculo completo en cada consulta
+    VERIFICAR_ESTADISTICAS = False
+    # Guardar también una instantánea binaria (weddings.bin) para arrancar más rápido
+    INSTANTANEA_BINARIA = True
     
     # Temas predefinidos
     TEMAS = [
@@ -2,10 +2,19 @@
 
 import json
 import csv
+import gzip
+import lzma
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-from .models import Recurso, Evento, Restriccion, EstadoEvento, TipoRecurso, TipoRestriccion, TipoBoda
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
 from .wedding_manager import DreamWeddingPlanner
+from .codec import cargar_archivo, codificar_datos, decodificar_datos
+from . import columnar
+
+# Filas por bloque al exportar y tamaño del búfer de escritura (256 KiB)
+TAMANO_BLOQUE = 1000
+TAMANO_BUFFER = 1 << 18
 
 class DataHandler:
     """Manejador de datos para persistencia en JSON y exportación"""
@@ -14,58 +23,10 @@ class DataHandler:
     def cargar_datos(archivo: str, manager: DreamWeddingPlanner) -> bool:
         """Carga datos desde un archivo JSON"""
         try:
-            with open(archivo, 'r', encoding='utf-8') as f:
-                datos = json.load(f)
-            
-            # Cargar recursos
-            manager.recursos = []
-            for r in datos.get('recursos', []):
-                recurso = Recurso(
-                    id=r['id'],
-                    nombre=r['nombre'],
-                    tipo=TipoRecurso(r['tipo']),
-                    capacidad=r.get('capacidad', 1),
-                    precio=r.get('precio', 0.0),
-                    disponible=r.get('disponible', True),
-                    descripcion=r.get('descripcion', '')
-                )
-                if 'eventos_asignados' in r:
-                    recurso.eventos_asignados = [
-                        (eid, datetime.fromisoformat(inicio), datetime.fromisoformat(fin))
-                        for eid, inicio, fin in r['eventos_asignados']
-                    ]
-                manager.recursos.append(recurso)
-            
-            # Cargar eventos
-            manager.eventos = []
-            for e in datos.get('eventos', []):
-                evento = Evento(
-                    id=e['id'],
-                    nombre=e['nombre'],
-                    inicio=datetime.fromisoformat(e['inicio']),
-                    fin=datetime.fromisoformat(e['fin']),
-                    recursos_solicitados=e['recursos_solicitados'],
-                    descripcion=e.get('descripcion', ''),
-                    tipo_boda=TipoBoda(e.get('tipo_boda', 'Personalizada')),
-                    presupuesto=e.get('presupuesto', 0.0),
-                    estado=EstadoEvento(e.get('estado', EstadoEvento.PENDIENTE.value)),
-                    num_invitados=e.get('num_invitados', 0),
-                    fecha_creacion=datetime.fromisoformat(e.get('fecha_creacion', datetime.now().isoformat()))
-                )
-                manager.eventos.append(evento)
-                if evento.id >= manager.proximo_id_evento:
-                    manager.proximo_id_evento = evento.id + 1
-            
-            # Cargar restricciones
-            manager.restricciones = []
-            for r in datos.get('restricciones', []):
-                restriccion = Restriccion(
-                    tipo=TipoRestriccion(r['tipo']),
-                    recursos_involucrados=r['recursos_involucrados'],
-                    descripcion=r['descripcion']
-                )
-                manager.restricciones.append(restriccion)
-            
+            recursos, eventos, restricciones, tiempos = cargar_archivo(archivo)
+            if not manager.reemplazar_datos(recursos, eventos, restricciones):
+                return False
+            manager.tiempos_carga = tiempos
             return True
             
         except FileNotFoundError:
@@ -79,11 +40,8 @@ class DataHandler:
     def guardar_datos(archivo: str, manager: DreamWeddingPlanner) -> bool:
         """Guarda los datos en un archivo JSON"""
         try:
-            datos = {
-                'recursos': [recurso.to_dict() for recurso in manager.recursos],
-                'eventos': [evento.to_dict() for evento in manager.eventos],
-                'restricciones': [restriccion.to_dict() for restriccion in manager.restricciones]
-            }
+            manager.cargar_historial()
+            datos = manager.exportar_datos()
             
             with open(archivo, 'w', encoding='utf-8') as f:
                 json.dump(datos, f, indent=2, ensure_ascii=False)
@@ -97,60 +55,127 @@ class DataHandler:
     def crear_archivo_ejemplo(archivo: str):
         """Crea un archivo de datos de ejemplo"""
         manager = DreamWeddingPlanner()
-        datos = {
-            'recursos': [recurso.to_dict() for recurso in manager.recursos],
-            'eventos': [],
-            'restricciones': [restriccion.to_dict() for restriccion in manager.restricciones]
-        }
+        datos = codificar_datos(manager.recursos, [], manager.restricciones)
         
         with open(archivo, 'w', encoding='utf-8') as f:
             json.dump(datos, f, indent=2, ensure_ascii=False)
     
     @staticmethod
-    def exportar_datos_csv(manager: DreamWeddingPlanner, archivo_salida: str) -> bool:
-        """Exporta datos a CSV para análisis"""
+    def _abrir_salida(archivo: str, compresion: Optional[str] = None) -> Tuple[TextIO, str]:
+        """
+        Abre un archivo de texto para escritura, comprimido si se pide
+        Retorna (archivo abierto, ruta final con la extensión de la compresión)
+        """
+        if compresion == 'gzip':
+            ruta = f"{archivo}.gz"
+            return gzip.open(ruta, 'wt', newline='', encoding='utf-8', compresslevel=6), ruta
+        if compresion == 'lzma':
+            ruta = f"{archivo}.xz"
+            return lzma.open(ruta, 'wt', newline='', encoding='utf-8'), ruta
+        if compresion is not None:
+            raise ValueError(f"Compresión desconocida: {compresion} (opciones: gzip, lzma)")
+        return open(archivo, 'w', newline='', encoding='utf-8', buffering=TAMANO_BUFFER), archivo
+    
+    @staticmethod
+    def _en_bloques(filas: Iterable, tamano: int) -> Iterator[List]:
+        """Agrupa un iterable en listas de hasta `tamano` elementos"""
+        iterador = iter(filas)
+        while True:
+            bloque = list(islice(iterador, tamano))
+            if not bloque:
+                return
+            yield bloque
+    
+    @staticmethod
+    def _filas_eventos(manager: DreamWeddingPlanner) -> Iterator[Tuple]:
+        """Filas del CSV de eventos, generadas de una en una"""
+        yield ('ID', 'Nombre', 'Fecha Inicio', 'Fecha Fin', 'Tipo', 'Presupuesto', 'Invitados', 'Estado')
+        for evento in manager.eventos:
+            yield (
+                evento.id,
+                evento.nombre,
+                evento.inicio.isoformat(' ', 'minutes'),
+                evento.fin.isoformat(' ', 'minutes'),
+                evento.tipo_boda.value,
+                evento.presupuesto,
+                evento.num_invitados,
+                evento.estado.value
+            )
+    
+    @staticmethod
+    def _filas_recursos(manager: DreamWeddingPlanner) -> Iterator[Tuple]:
+        """Filas del CSV de recursos, generadas de una en una"""
+        yield ('ID', 'Nombre', 'Tipo', 'Capacidad', 'Precio', 'Disponible', 'Eventos Asignados')
+        for recurso in manager.recursos:
+            yield (
+                recurso.id,
+                recurso.nombre,
+                recurso.tipo.value,
+                recurso.capacidad,
+                recurso.precio,
+                'Sí' if recurso.disponible else 'No',
+                len(recurso.eventos_asignados)
+            )
+    
+    @staticmethod
+    def _filas_restricciones(manager: DreamWeddingPlanner) -> Iterator[Tuple]:
+        """Filas del CSV de restricciones, generadas de una en una"""
+        yield ('Tipo', 'Recursos Involucrados', 'Descripción')
+        for restriccion in manager.restricciones:
+            yield (
+                restriccion.tipo.value,
+                ', '.join(map(str, restriccion.recursos_involucrados)),
+                restriccion.descripcion
+            )
+    
+    @staticmethod
+    def _escribir_csv(archivo: str, filas: Iterable[Tuple], compresion: Optional[str],
+                      tamano_bloque: int) -> str:
+        """Escribe las filas por bloques y retorna la ruta escrita"""
+        salida, ruta = DataHandler._abrir_salida(archivo, compresion)
+        with salida:
+            writer = csv.writer(salida)
+            for bloque in DataHandler._en_bloques(filas, tamano_bloque):
+                writer.writerows(bloque)
+        return ruta
+    
+    @staticmethod
+    def exportar_datos_csv(manager: DreamWeddingPlanner, archivo_salida: str,
+                           compresion: Optional[str] = None, paralelo: bool = True,
+                           tamano_bloque: int = TAMANO_BLOQUE) -> bool:
+        """
+        Exporta datos a CSV para análisis
+        
+        Las filas se generan bajo demanda y se escriben por bloques, así que la
+        memoria usada no depende del número de eventos.
+        
+        Args:
+            manager: Gestor con los datos a exportar
+            archivo_salida: Prefijo de los archivos (_eventos.csv, _recursos.csv, _restricciones.csv)
+            compresion: None, 'gzip' (.csv.gz) o 'lzma' (.csv.xz)
+            paralelo: Escribir los tres archivos a la vez en hilos separados
+            tamano_bloque: Filas por bloque de escritura
+        """
+        # Las exportaciones incluyen los eventos archivados que aún no se cargaron
+        manager.cargar_historial()
+        trabajos = [
+            (f"{archivo_salida}_eventos.csv", DataHandler._filas_eventos(manager)),
+            (f"{archivo_salida}_recursos.csv", DataHandler._filas_recursos(manager)),
+            (f"{archivo_salida}_restricciones.csv", DataHandler._filas_restricciones(manager)),
+        ]
         try:
-            # Exportar eventos
-            with open(f"{archivo_salida}_eventos.csv", 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['ID', 'Nombre', 'Fecha Inicio', 'Fecha Fin', 'Tipo', 'Presupuesto', 'Invitados', 'Estado'])
-                for evento in manager.eventos:
-                    writer.writerow([
-                        evento.id,
-                        evento.nombre,
-                        evento.inicio.strftime('%Y-%m-%d %H:%M'),
-                        evento.fin.strftime('%Y-%m-%d %H:%M'),
-                        evento.tipo_boda.value,
-                        evento.presupuesto,
-                        evento.num_invitados,
-                        evento.estado.value
-                    ])
-            
-            # Exportar recursos
-            with open(f"{archivo_salida}_recursos.csv", 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['ID', 'Nombre', 'Tipo', 'Capacidad', 'Precio', 'Disponible', 'Eventos Asignados'])
-                for recurso in manager.recursos:
-                    writer.writerow([
-                        recurso.id,
-                        recurso.nombre,
-                        recurso.tipo.value,
-                        recurso.capacidad,
-                        recurso.precio,
-                        'Sí' if recurso.disponible else 'No',
-                        len(recurso.eventos_asignados)
-                    ])
-            
-            # Exportar restricciones
-            with open(f"{archivo_salida}_restricciones.csv", 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Tipo', 'Recursos Involucrados', 'Descripción'])
-                for restriccion in manager.restricciones:
-                    writer.writerow([
-                        restriccion.tipo.value,
-                        ', '.join(map(str, restriccion.recursos_involucrados)),
-                        restriccion.descripcion
-                    ])
+            if paralelo:
+                # La compresión y la escritura liberan el GIL, así que los hilos se solapan
+                with ThreadPoolExecutor(max_workers=len(trabajos)) as executor:
+                    futuros = [
+                        executor.submit(DataHandler._escribir_csv, archivo, filas, compresion, tamano_bloque)
+                        for archivo, filas in trabajos
+                    ]
+                    for futuro in futuros:
+                        futuro.result()
+            else:
+                for archivo, filas in trabajos:
+                    DataHandler._escribir_csv(archivo, filas, compresion, tamano_bloque)
             
             return True
         except Exception as e:
@@ -158,51 +183,119 @@ class DataHandler:
             return False
     
     @staticmethod
-    def generar_reporte_completo(manager: DreamWeddingPlanner, archivo_salida: str) -> bool:
-        """Genera un reporte completo en formato texto"""
+    def _lineas_reporte(manager: DreamWeddingPlanner, desde: Optional[datetime] = None,
+                        hasta: Optional[datetime] = None) -> Iterator[str]:
+        """Líneas del reporte completo, generadas de una en una"""
+        yield "=" * 60 + "\n"
+        yield "REPORTE COMPLETO - DREAM WEDDING PLANNER\n"
+        yield "=" * 60 + "\n\n"
+        if desde is not None or hasta is not None:
+            inicio_periodo = desde.strftime('%d/%m/%Y') if desde else "el principio"
+            fin_periodo = hasta.strftime('%d/%m/%Y') if hasta else "el final"
+            yield f"Periodo: desde {inicio_periodo} hasta {fin_periodo}\n\n"
+        
+        # Estadísticas generales
+        stats = manager.obtener_estadisticas()
+        yield "ESTADÍSTICAS GENERALES\n"
+        yield "-" * 60 + "\n"
+        yield f"Total de eventos: {stats['total_eventos']}\n"
+        yield f"Eventos confirmados: {stats['eventos_confirmados']}\n"
+        yield f"Eventos pendientes: {stats['eventos_pendientes']}\n"
+        yield f"Ingresos totales: ${stats['ingresos_totales']:,.2f}\n"
+        yield f"Recursos totales: {stats['recursos_totales']}\n"
+        yield f"Recursos disponibles: {stats['recursos_disponibles']}\n\n"
+        
+        # Eventos
+        yield "LISTADO DE EVENTOS\n"
+        yield "-" * 60 + "\n"
+        for evento in manager.obtener_eventos_en_rango(desde, hasta):
+            inicio = evento.inicio
+            yield (
+                f"\nID: {evento.id}\n"
+                f"Nombre: {evento.nombre}\n"
+                f"Fecha: {inicio.day:02d}/{inicio.month:02d}/{inicio.year} "
+                f"{inicio.hour:02d}:{inicio.minute:02d} - {evento.fin.hour:02d}:{evento.fin.minute:02d}\n"
+                f"Tipo: {evento.tipo_boda.value}\n"
+                f"Invitados: {evento.num_invitados}\n"
+                f"Presupuesto: ${evento.presupuesto:,.2f}\n"
+                f"Estado: {evento.estado.value}\n"
+                + "-" * 40 + "\n"
+            )
+        
+        # Recursos
+        yield "\nLISTADO DE RECURSOS\n"
+        yield "-" * 60 + "\n"
+        for recurso in manager.recursos:
+            yield (
+                f"\nID: {recurso.id}\n"
+                f"Nombre: {recurso.nombre}\n"
+                f"Tipo: {recurso.tipo.value}\n"
+                f"Precio: ${recurso.precio:,.2f}\n"
+                f"Disponible: {'Sí' if recurso.disponible else 'No'}\n"
+                f"Eventos asignados: {len(recurso.eventos_asignados)}\n"
+                + "-" * 40 + "\n"
+            )
+    
+    @staticmethod
+    def generar_reporte_completo(manager: DreamWeddingPlanner, archivo_salida: str,
+                                 compresion: Optional[str] = None,
+                                 tamano_bloque: int = TAMANO_BLOQUE,
+                                 desde: Optional[datetime] = None,
+                                 hasta: Optional[datetime] = None) -> bool:
+        """
+        Genera un reporte completo en formato texto, escrito por bloques
+        
+        Los eventos se listan por fecha de inicio; con `desde`/`hasta` solo los
+        que empiezan en ese periodo (las estadísticas siguen siendo globales).
+        """
         try:
-            with open(archivo_salida, 'w', encoding='utf-8') as f:
-                f.write("=" * 60 + "\n")
-                f.write("REPORTE COMPLETO - DREAM WEDDING PLANNER\n")
-                f.write("=" * 60 + "\n\n")
-                
-                # Estadísticas generales
-                stats = manager.obtener_estadisticas()
-                f.write("ESTADÍSTICAS GENERALES\n")
-                f.write("-" * 60 + "\n")
-                f.write(f"Total de eventos: {stats['total_eventos']}\n")
-                f.write(f"Eventos confirmados: {stats['eventos_confirmados']}\n")
-                f.write(f"Eventos pendientes: {stats['eventos_pendientes']}\n")
-                f.write(f"Ingresos totales: ${stats['ingresos_totales']:,.2f}\n")
-                f.write(f"Recursos totales: {stats['recursos_totales']}\n")
-                f.write(f"Recursos disponibles: {stats['recursos_disponibles']}\n\n")
-                
-                # Eventos
-                f.write("LISTADO DE EVENTOS\n")
-                f.write("-" * 60 + "\n")
-                for evento in manager.eventos:
-                    f.write(f"\nID: {evento.id}\n")
-                    f.write(f"Nombre: {evento.nombre}\n")
-                    f.write(f"Fecha: {evento.inicio.strftime('%d/%m/%Y %H:%M')} - {evento.fin.strftime('%H:%M')}\n")
-                    f.write(f"Tipo: {evento.tipo_boda.value}\n")
-                    f.write(f"Invitados: {evento.num_invitados}\n")
-                    f.write(f"Presupuesto: ${evento.presupuesto:,.2f}\n")
-                    f.write(f"Estado: {evento.estado.value}\n")
-                    f.write("-" * 40 + "\n")
-                
-                # Recursos
-                f.write("\nLISTADO DE RECURSOS\n")
-                f.write("-" * 60 + "\n")
-                for recurso in manager.recursos:
-                    f.write(f"\nID: {recurso.id}\n")
-                    f.write(f"Nombre: {recurso.nombre}\n")
-                    f.write(f"Tipo: {recurso.tipo.value}\n")
-                    f.write(f"Precio: ${recurso.precio:,.2f}\n")
-                    f.write(f"Disponible: {'Sí' if recurso.disponible else 'No'}\n")
-                    f.write(f"Eventos asignados: {len(recurso.eventos_asignados)}\n")
-                    f.write("-" * 40 + "\n")
+            manager.cargar_historial()
+            salida, _ = DataHandler._abrir_salida(archivo_salida, compresion)
+            with salida:
+                lineas = DataHandler._lineas_reporte(manager, desde, hasta)
+                for bloque in DataHandler._en_bloques(lineas, tamano_bloque):
+                    salida.write("".join(bloque))
             
             return True
         except Exception as e:
             print(f"Error generando reporte: {e}")
+            return False
+    
+    @staticmethod
+    def exportar_datos_columnar(manager: DreamWeddingPlanner, archivo_salida: str,
+                                formato: Optional[str] = None) -> bool:
+        """
+        Exporta eventos, recursos y asignaciones en formato columnar con pandas
+        
+        Args:
+            manager: Gestor con los datos a exportar
+            archivo_salida: Prefijo de los archivos (_eventos, _recursos, _asignaciones)
+            formato: 'parquet', 'feather' o 'pickle' (por defecto Parquet si hay pyarrow)
+        """
+        try:
+            formato = formato or columnar.formato_por_defecto()
+            manager.cargar_historial()
+            tablas = columnar.tablas_desde_modelos(manager.recursos, manager.eventos)
+            columnar.escribir_tablas(tablas, archivo_salida, formato)
+            return True
+        except Exception as e:
+            print(f"Error exportando en formato columnar: {e}")
+            return False
+    
+    @staticmethod
+    def importar_datos_columnar(archivo_entrada: str, manager: DreamWeddingPlanner,
+                                formato: Optional[str] = None) -> bool:
+        """
+        Reemplaza eventos y recursos del gestor por los de una exportación columnar
+        
+        Las restricciones del gestor se conservan; el formato se detecta si no se indica.
+        Los datos importados se guardan como instantánea completa.
+        """
+        try:
+            tablas = columnar.leer_tablas(archivo_entrada, formato)
+            datos = columnar.datos_desde_tablas(tablas, manager.restricciones)
+            recursos, eventos, restricciones = decodificar_datos(datos)
+            return manager.reemplazar_datos(recursos, eventos, restricciones)
+        except Exception as e:
+            print(f"Error importando datos columnares: {e}")
             return False
\ No newline at end of file
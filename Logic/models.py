@@ -4,6 +4,7 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from typing import List, Tuple, Optional, Dict
+from .calendario import CalendarioRecurso, VistaReservas
 
 class TipoBoda(Enum):
     """Tipos de bodas disponibles"""
@@ -34,7 +35,7 @@ class TipoRestriccion(Enum):
     EXCLUSION = "exclusion"
     DEPENDENCIA = "dependencia"
 
-@dataclass
+@dataclass(slots=True)
 class Recurso:
     """Representa un recurso disponible para bodas"""
     id: int
@@ -44,7 +45,18 @@ class Recurso:
     precio: float = 0.0
     disponible: bool = True
     descripcion: str = ""
+    # Reservas (evento_id, inicio, fin); al asignar se admite un cuarto elemento con las unidades.
+    # Se guardan en un calendario por columnas y se leen a través de una vista.
     eventos_asignados: List[Tuple[int, datetime, datetime]] = field(default_factory=list)
+    _calendario: CalendarioRecurso = field(init=False, repr=False, compare=False)
+    
+    def __setattr__(self, nombre, valor):
+        # Asignar una lista de reservas reconstruye el calendario indexado
+        if nombre == 'eventos_asignados' and not isinstance(valor, VistaReservas):
+            calendario = CalendarioRecurso(valor)
+            object.__setattr__(self, '_calendario', calendario)
+            valor = VistaReservas(calendario)
+        object.__setattr__(self, nombre, valor)
     
     def __post_init__(self):
         # Convertir string a TipoRecurso si es necesario
@@ -54,49 +66,82 @@ class Recurso:
             except ValueError:
                 self.tipo = TipoRecurso.PERSONAL
     
-    def esta_disponible(self, inicio: datetime, fin: datetime) -> bool:
-        """Verifica si el recurso está disponible en un horario específico"""
+    @property
+    def unidades_totales(self) -> int:
+        """
+        Unidades que pueden reservarse a la vez
+        
+        En los lugares la capacidad indica invitados, así que se reservan en
+        exclusiva; en el resto (personal, catering, decoración) la capacidad
+        es el número de unidades que pueden atender eventos simultáneos.
+        """
+        if self.tipo in (TipoRecurso.CEREMONIA, TipoRecurso.RECEPCION):
+            return 1
+        return max(1, self.capacidad)
+    
+    def esta_disponible(self, inicio: datetime, fin: datetime, unidades: int = 1) -> bool:
+        """Verifica si el recurso tiene `unidades` libres en un horario específico"""
         if not self.disponible:
             return False
-        
-        for _, inicio_existente, fin_existente in self.eventos_asignados:
-            # Detectar solapamiento de intervalos
-            if max(inicio, inicio_existente) < min(fin, fin_existente):
-                return False
-        return True
-    
-    def asignar_evento(self, evento_id: int, inicio: datetime, fin: datetime) -> bool:
-        """Asigna un evento al recurso si está disponible"""
-        if self.esta_disponible(inicio, fin):
-            self.eventos_asignados.append((evento_id, inicio, fin))
-            return True
-        return False
+        return self._calendario.hay_capacidad(inicio, fin, unidades, self.unidades_totales)
+    
+    def unidades_libres(self, inicio: datetime, fin: datetime) -> int:
+        """Unidades que quedan libres durante todo el intervalo"""
+        if not self.disponible:
+            return 0
+        return max(0, self.unidades_totales - self._calendario.carga_maxima(inicio, fin))
+    
+    def reservas_en_rango(self, inicio: datetime, fin: datetime) -> List[Tuple[int, datetime, datetime]]:
+        """Devuelve las reservas que se solapan con el intervalo dado"""
+        return self._calendario.solapadas(inicio, fin)
+    
+    def columnas_reservas(self, inicio: datetime, fin: datetime):
+        """Columnas (inicios, fines, unidades) en microsegundos de las reservas del rango"""
+        return self._calendario.columnas(inicio, fin)
+    
+    def intervalos_ocupados(self, inicio: datetime, fin: datetime,
+                            unidades: int = 1) -> List[Tuple[datetime, datetime]]:
+        """Intervalos, ordenados por inicio, en los que no quedan `unidades` libres"""
+        return self._calendario.intervalos_saturados(inicio, fin, unidades, self.unidades_totales)
     
-    def liberar_evento(self, evento_id: int) -> bool:
-        """Libera un evento del recurso"""
-        eventos_filtrados = [e for e in self.eventos_asignados if e[0] != evento_id]
-        if len(eventos_filtrados) < len(self.eventos_asignados):
-            self.eventos_asignados = eventos_filtrados
+    def asignar_evento(self, evento_id: int, inicio: datetime, fin: datetime,
+                       unidades: int = 1) -> bool:
+        """Asigna un evento al recurso si tiene unidades disponibles"""
+        if self.esta_disponible(inicio, fin, unidades):
+            self._calendario.agregar(evento_id, inicio, fin, unidades)
             return True
         return False
     
-    def to_dict(self) -> Dict:
-        """Convierte el recurso a diccionario para JSON"""
-        return {
+    def liberar_evento(self, evento_id: int, inicio: Optional[datetime] = None) -> bool:
+        """Libera un evento del recurso (conocer su inicio acelera la búsqueda)"""
+        return self._calendario.quitar(evento_id, inicio)
+    
+    def to_dict(self, incluir_reservas: bool = True) -> Dict:
+        """
+        Convierte el recurso a diccionario para JSON
+        
+        Sin `incluir_reservas` se omiten las reservas, que el formato normalizado
+        guarda una sola vez en los eventos.
+        """
+        datos = {
             'id': self.id,
             'nombre': self.nombre,
             'tipo': self.tipo.value,
             'capacidad': self.capacidad,
             'precio': self.precio,
             'disponible': self.disponible,
-            'descripcion': self.descripcion,
-            'eventos_asignados': [
+            'descripcion': self.descripcion
+        }
+        if incluir_reservas:
+            datos['eventos_asignados'] = [
                 (eid, inicio.isoformat(), fin.isoformat())
+                if self._calendario.unidades_de(eid) == 1 else
+                (eid, inicio.isoformat(), fin.isoformat(), self._calendario.unidades_de(eid))
                 for eid, inicio, fin in self.eventos_asignados
             ]
-        }
+        return datos
 
-@dataclass
+@dataclass(slots=True)
 class Evento:
     """Representa un evento de boda"""
     id: int
@@ -110,6 +155,8 @@ class Evento:
     estado: EstadoEvento = EstadoEvento.PENDIENTE
     num_invitados: int = 0
     fecha_creacion: datetime = field(default_factory=datetime.now)
+    # Unidades pedidas por recurso; los recursos que no aparecen usan 1
+    unidades_solicitadas: Dict[int, int] = field(default_factory=dict)
     
     def __post_init__(self):
         # Convertir strings a Enums si es necesario
@@ -150,10 +197,16 @@ class Evento:
             'presupuesto': self.presupuesto,
             'estado': self.estado.value,
             'num_invitados': self.num_invitados,
-            'fecha_creacion': self.fecha_creacion.isoformat()
+            'fecha_creacion': self.fecha_creacion.isoformat(),
+            'unidades_solicitadas': {str(rid): n for rid, n in self.unidades_solicitadas.items()}
         }
 
-@dataclass
+# Búsqueda directa de enums por valor (más rápida que llamar al constructor)
+TIPOS_BODA = {t.value: t for t in TipoBoda}
+ESTADOS_EVENTO = {e.value: e for e in EstadoEvento}
+TIPOS_RECURSO = {t.value: t for t in TipoRecurso}
+
+@dataclass(slots=True)
 class Restriccion:
     """Representa una restricción entre recursos"""
     tipo: TipoRestriccion
@@ -191,6 +244,13 @@ class Restriccion:
                 return False, f"Violación de exclusión: {self.descripcion}"
             return True, ""
         
+        elif self.tipo == TipoRestriccion.DEPENDENCIA:
+            # El primer recurso requiere directamente todos los demás
+            principal, requeridos = self.recursos_involucrados[0], self.recursos_involucrados[1:]
+            if principal in recursos_solicitados and any(r not in recursos_solicitados for r in requeridos):
+                return False, f"Violación de dependencia: {self.descripcion}"
+            return True, ""
+        
         return True, ""
     
     def to_dict(self) -> Dict:
@@ -0,0 +1,155 @@
+# Matriz de ocupación recurso × tiempo (opcional, requiere NumPy)
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from .calendario import a_marca
+from .models import Recurso
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa la búsqueda por eventos
+    np = None
+
+NUMPY_DISPONIBLE = np is not None
+
+# Un elemento de la consulta es un recurso o un grupo de alternativas (basta con uno libre)
+GrupoRecursos = Union[int, Sequence[int]]
+
+class MatrizOcupacion:
+    """
+    Ocupación de cada recurso discretizada en franjas de tamaño fijo
+
+    Para cada recurso se guarda un vector con las unidades ocupadas en cada
+    franja. Una franja cuenta como ocupada si alguna reserva la toca, aunque
+    sea parcialmente. Las consultas de varios recursos se reducen a AND/OR
+    de máscaras booleanas de inicios válidos (franjas desde las que el
+    recurso está libre durante toda la duración) más un escaneo de rachas.
+    """
+
+    def __init__(self, recursos: Iterable[Recurso], origen: datetime, horizonte: timedelta,
+                 granularidad: timedelta = timedelta(minutes=30)):
+        if np is None:
+            raise ImportError("La matriz de ocupación requiere NumPy")
+
+        self.origen = origen
+        self.granularidad = granularidad
+        self.num_franjas = -(-horizonte // granularidad)
+        self.fin = origen + self.num_franjas * granularidad
+        self._origen_marca = a_marca(origen)
+        self._paso = granularidad // timedelta(microseconds=1)
+        self._carga: Dict[int, "np.ndarray"] = {}
+        self._capacidad: Dict[int, int] = {}
+
+        for recurso in recursos:
+            self.indexar_recurso(recurso)
+
+    def cubre(self, desde: datetime, hasta: datetime, granularidad: timedelta) -> bool:
+        """Indica si la matriz sirve para consultas en [desde, hasta) con esa granularidad"""
+        return granularidad == self.granularidad and self.origen <= desde and hasta <= self.fin
+
+    def _franjas(self, inicios, fines):
+        """Índices [primera, última) de las franjas que tocan cada intervalo"""
+        primeras = (inicios - self._origen_marca) // self._paso
+        ultimas = -((self._origen_marca - fines) // self._paso)
+        return (np.clip(primeras, 0, self.num_franjas),
+                np.clip(ultimas, 0, self.num_franjas))
+
+    def indexar_recurso(self, recurso: Recurso) -> None:
+        """Construye el vector de carga de un recurso a partir de sus reservas"""
+        inicios, fines, unidades = recurso.columnas_reservas(self.origen, self.fin)
+        inicios = np.frombuffer(inicios, dtype=np.int64)
+        fines = np.frombuffer(fines, dtype=np.int64)
+        unidades = np.asarray(unidades, dtype=np.int32)
+
+        vigentes = fines > self._origen_marca
+        primeras, ultimas = self._franjas(inicios[vigentes], fines[vigentes])
+        unidades = unidades[vigentes]
+
+        # Vector de diferencias: +u al entrar, -u al salir, y suma acumulada
+        diferencias = np.zeros(self.num_franjas + 1, dtype=np.int32)
+        np.add.at(diferencias, primeras, unidades)
+        np.add.at(diferencias, ultimas, -unidades)
+
+        self._carga[recurso.id] = np.cumsum(diferencias[:-1], dtype=np.int32)
+        self._capacidad[recurso.id] = recurso.unidades_totales if recurso.disponible else 0
+
+    def registrar(self, recurso_id: int, inicio: datetime, fin: datetime,
+                  unidades: int = 1, signo: int = 1) -> None:
+        """Suma (signo=1) o resta (signo=-1) una reserva del vector de un recurso"""
+        carga = self._carga.get(recurso_id)
+        if carga is None:
+            return
+        primeras, ultimas = self._franjas(np.array([a_marca(inicio)]), np.array([a_marca(fin)]))
+        carga[primeras[0]:ultimas[0]] += signo * unidades
+
+    def franjas_libres(self, recurso_id: int, unidades: int = 1) -> "np.ndarray":
+        """Máscara de franjas en las que el recurso tiene unidades libres"""
+        carga = self._carga.get(recurso_id)
+        if carga is None:
+            return np.ones(self.num_franjas, dtype=bool)
+        return carga + unidades <= self._capacidad[recurso_id]
+
+    def inicios_libres(self, grupo: GrupoRecursos, franjas: int, unidades: int = 1) -> "np.ndarray":
+        """
+        Máscara de franjas en las que puede empezar una reserva de `franjas` franjas
+
+        En un grupo basta con que una alternativa esté libre durante todas las
+        franjas; no vale combinar huecos de alternativas distintas.
+        """
+        if isinstance(grupo, int):
+            return _inicios(self.franjas_libres(grupo, unidades), franjas)
+
+        inicios = np.zeros(max(0, self.num_franjas - franjas + 1), dtype=bool)
+        for recurso_id in grupo:
+            if recurso_id in self._carga:
+                inicios |= _inicios(self.franjas_libres(recurso_id, unidades), franjas)
+        return inicios
+
+    def ventanas_libres(self, recursos: Sequence[GrupoRecursos], duracion: timedelta,
+                        desde: datetime, hasta: datetime,
+                        unidades: Optional[Dict[int, int]] = None) -> List[Tuple[datetime, datetime]]:
+        """
+        Ventanas comunes libres de al menos `duracion` que empiezan en [desde, hasta)
+
+        Returns:
+            Lista de tuplas (inicio, fin) alineadas a la granularidad: cada ventana
+            reúne inicios consecutivos en los que cada recurso, o una misma
+            alternativa de cada grupo, está libre durante toda la duración
+        """
+        unidades = unidades or {}
+        franjas_necesarias = max(1, -(-duracion // self.granularidad))
+        primera = max(0, -(-(desde - self.origen) // self.granularidad))
+        limite = min(self.num_franjas, -(-(hasta - self.origen) // self.granularidad))
+        ultima = min(self.num_franjas, limite + franjas_necesarias)
+        if primera >= limite:
+            return []
+
+        # Inicios cuya reserva completa cabe en [primera, ultima)
+        ultimo_inicio = ultima - franjas_necesarias + 1
+        if primera >= ultimo_inicio:
+            return []
+        mascara = np.ones(ultimo_inicio - primera, dtype=bool)
+        for grupo in recursos:
+            solicitadas = unidades.get(grupo, 1) if isinstance(grupo, int) else 1
+            mascara &= self.inicios_libres(grupo, franjas_necesarias, solicitadas)[primera:ultimo_inicio]
+
+        # Cada racha de inicios válidos consecutivos es una ventana que
+        # termina `franjas_necesarias` franjas después de su último inicio
+        bordes = np.diff(np.concatenate(([0], mascara.view(np.int8), [0])))
+        comienzos = np.flatnonzero(bordes == 1)
+        finales = np.flatnonzero(bordes == -1)
+        validas = comienzos + primera < limite
+
+        return [
+            (self.origen + int(c + primera) * self.granularidad,
+             self.origen + int(f - 1 + franjas_necesarias + primera) * self.granularidad)
+            for c, f in zip(comienzos[validas], finales[validas])
+        ]
+
+def _inicios(libres: "np.ndarray", franjas: int) -> "np.ndarray":
+    """Máscara de posiciones desde las que hay `franjas` franjas libres seguidas"""
+    if franjas > len(libres):
+        return np.zeros(0, dtype=bool)
+    # Suma acumulada: la ventana [i, i + franjas) está libre si suma `franjas`
+    acumuladas = np.concatenate(([0], np.cumsum(libres, dtype=np.int32)))
+    return acumuladas[franjas:] - acumuladas[:-franjas] == franjas
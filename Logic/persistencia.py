@@ -0,0 +1,395 @@
+# Persistencia en disco: instantáneas atómicas, diario de cambios y cerrojo entre procesos
+
+import atexit
+import json
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # fcntl no existe en Windows: el cerrojo solo coordina hilos del proceso
+    fcntl = None
+
+FCNTL_DISPONIBLE = fcntl is not None
+
+# Instantánea binaria: cabecera, tabla de longitudes, pickle y búferes fuera de banda
+MAGIA_BINARIA = b'DWPB'
+VERSION_BINARIA = 1
+_CABECERA = struct.Struct('<4sHII')  # magia, versión, número de búferes, crc32 del resto
+_LONGITUD = struct.Struct('<Q')
+
+def codificar_json(datos: Any) -> bytes:
+    """Serializa a JSON compacto en UTF-8"""
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def escribir_json_atomico(archivo: str, datos: Dict) -> None:
+    """Escribe un JSON de forma atómica"""
+    escribir_atomico(archivo, [codificar_json(datos)])
+
+def firma_archivo(archivo: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Firma barata de un archivo (mtime en ns, tamaño, inodo) para detectar cambios
+    Retorna None si el archivo no existe
+    """
+    try:
+        estado = os.stat(archivo)
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size, estado.st_ino
+
+def escribir_atomico(archivo: str, partes: Iterable[bytes]) -> None:
+    """
+    Escribe un archivo de forma atómica
+
+    Se escribe en un archivo temporal del mismo directorio, se fuerza a disco
+    y se renombra sobre el destino: un corte a mitad de escritura deja el
+    archivo anterior intacto.
+    """
+    directorio = os.path.dirname(os.path.abspath(archivo))
+    descriptor, temporal = tempfile.mkstemp(prefix=".tmp_", dir=directorio)
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            for parte in partes:
+                f.write(parte)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea el archivo con permisos 0600; conservar los del original
+        modo = os.stat(archivo).st_mode & 0o777 if os.path.exists(archivo) else 0o644
+        os.chmod(temporal, modo)
+        os.replace(temporal, archivo)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+def serializar_binario(objeto: Any) -> List[bytes]:
+    """
+    Serializa un objeto como instantánea binaria versionada
+
+    Usa pickle con protocolo 5: los objetos que exponen búferes (las columnas
+    de los calendarios) se vuelcan en bloque, fuera del flujo del pickle.
+
+    Returns:
+        Partes del archivo, listas para escribir_atomico
+    """
+    buffers: List[pickle.PickleBuffer] = []
+    contenido = pickle.dumps(objeto, protocol=5, buffer_callback=buffers.append)
+    # Se copian los búferes: mientras una vista siga viva el array no puede crecer
+    cuerpo = [contenido]
+    for buffer in buffers:
+        cuerpo.append(bytes(buffer.raw()))
+        buffer.release()
+    longitudes = b"".join(_LONGITUD.pack(len(parte)) for parte in cuerpo)
+
+    crc = zlib.crc32(longitudes)
+    for parte in cuerpo:
+        crc = zlib.crc32(parte, crc)
+    cabecera = _CABECERA.pack(MAGIA_BINARIA, VERSION_BINARIA, len(buffers), crc)
+    return [cabecera, longitudes, *cuerpo]
+
+def leer_binario(archivo: str) -> Any:
+    """
+    Lee una instantánea escrita con serializar_binario
+
+    Raises:
+        ValueError: si el archivo no tiene el formato o la versión esperados,
+                    o si la suma de verificación no coincide
+    """
+    with open(archivo, 'rb') as f:
+        contenido = memoryview(f.read())
+
+    if len(contenido) < _CABECERA.size:
+        raise ValueError("instantánea binaria truncada")
+    magia, version, num_buffers, crc = _CABECERA.unpack_from(contenido)
+    if magia != MAGIA_BINARIA:
+        raise ValueError("no es una instantánea binaria")
+    if version != VERSION_BINARIA:
+        raise ValueError(f"versión de instantánea no soportada: {version}")
+    if zlib.crc32(contenido[_CABECERA.size:]) != crc:
+        raise ValueError("suma de verificación incorrecta")
+
+    posicion = _CABECERA.size
+    longitudes = []
+    for _ in range(num_buffers + 1):
+        longitudes.append(_LONGITUD.unpack_from(contenido, posicion)[0])
+        posicion += _LONGITUD.size
+    partes = []
+    for longitud in longitudes:
+        partes.append(contenido[posicion:posicion + longitud])
+        posicion += longitud
+    if posicion != len(contenido):
+        raise ValueError("instantánea binaria con tamaño inesperado")
+
+    return pickle.loads(partes[0], buffers=partes[1:])
+
+class DiarioCambios:
+    """
+    Diario de cambios en formato JSON Lines (un registro por mutación)
+
+    Cada mutación añade una línea al final del archivo, así que guardar cuesta
+    lo mismo sin importar el tamaño del historial. Al arrancar se reproduce
+    el diario sobre la última instantánea.
+    """
+
+    def __init__(self, archivo: str):
+        self.archivo = archivo
+        self.num_registros = 0
+        # Bytes del diario cuyos registros ya están aplicados en memoria
+        self.desplazamiento = 0
+
+    def _leer_desde(self, desplazamiento: int) -> Tuple[List[Dict], int]:
+        """Registros completos a partir de un desplazamiento y bytes que ocupan"""
+        registros: List[Dict] = []
+        bytes_validos = 0
+        with open(self.archivo, 'rb') as f:
+            f.seek(desplazamiento)
+            for linea in f:
+                if not linea.endswith(b'\n'):
+                    break
+                try:
+                    registros.append(json.loads(linea))
+                except ValueError:
+                    break
+                bytes_validos += len(linea)
+        return registros, bytes_validos
+
+    def leer(self, reparar: bool = True) -> List[Dict]:
+        """
+        Lee todos los registros completos del diario
+
+        Si la última línea quedó a medias por un corte, se descarta y, con
+        `reparar`, se trunca el archivo para que los registros siguientes no
+        queden detrás.
+        """
+        if not os.path.exists(self.archivo):
+            self.num_registros = 0
+            self.desplazamiento = 0
+            return []
+
+        registros, bytes_validos = self._leer_desde(0)
+        if reparar and bytes_validos < os.path.getsize(self.archivo):
+            print(f"Aviso: se descartó un registro incompleto al final de {self.archivo}")
+            with open(self.archivo, 'r+b') as f:
+                f.truncate(bytes_validos)
+
+        self.num_registros = len(registros)
+        self.desplazamiento = bytes_validos
+        return registros
+
+    @property
+    def hay_nuevos(self) -> bool:
+        """Indica si el archivo cambió de tamaño desde la última lectura o escritura propia"""
+        try:
+            return os.path.getsize(self.archivo) != self.desplazamiento
+        except FileNotFoundError:
+            return self.desplazamiento != 0
+
+    def leer_nuevos(self) -> Optional[List[Dict]]:
+        """
+        Registros añadidos por otros procesos desde la última lectura
+
+        Una línea a medias se deja para la próxima lectura: puede ser una
+        escritura en curso. Retorna None si el diario se vació o se acortó,
+        en cuyo caso hay que releer la instantánea.
+        """
+        try:
+            tamano = os.path.getsize(self.archivo)
+        except FileNotFoundError:
+            tamano = 0
+        if tamano < self.desplazamiento:
+            return None
+        if tamano == self.desplazamiento:
+            return []
+        registros, bytes_validos = self._leer_desde(self.desplazamiento)
+        self.desplazamiento += bytes_validos
+        self.num_registros += len(registros)
+        return registros
+
+    def registrar(self, *registros: Dict) -> None:
+        """Añade uno o varios registros al final del diario con una sola escritura"""
+        lineas = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros)
+        with open(self.archivo, 'ab') as f:
+            inicio = f.seek(0, os.SEEK_END)
+            f.write(lineas.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            final = f.tell()
+        self.num_registros += len(registros)
+        # Si otro proceso escribió antes, sus registros (y los nuestros, que se
+        # ignoran al reproducirse) quedan por leer
+        if inicio == self.desplazamiento:
+            self.desplazamiento = final
+
+    def vaciar(self) -> None:
+        """Vacía el diario tras compactarlo en una instantánea"""
+        with open(self.archivo, 'w', encoding='utf-8'):
+            pass
+        self.num_registros = 0
+        self.desplazamiento = 0
+
+
+# Programadores vivos; la referencia débil no los mantiene (ni a su gestor) en memoria
+_PROGRAMADORES: "weakref.WeakSet[ProgramadorGuardado]" = weakref.WeakSet()
+
+@atexit.register
+def _vaciar_programadores() -> None:
+    """Al salir del intérprete guarda lo pendiente de los programadores que sigan vivos"""
+    for programador in list(_PROGRAMADORES):
+        programador.flush()
+
+class ProgramadorGuardado:
+    """
+    Agrupa en una sola escritura los guardados pedidos en ráfaga
+
+    Cada cambio marca los datos como pendientes; un hilo en segundo plano
+    espera a que pase `espera` segundos sin marcas nuevas y llama a
+    `guardar` una vez. El hilo termina en cuanto no queda nada pendiente y la
+    siguiente marca arranca otro. Con espera 0 se guarda en el mismo hilo,
+    sin demora. Al salir del intérprete se vacía lo pendiente.
+    """
+
+    def __init__(self, guardar: Callable[[], None], espera: float):
+        self._guardar = guardar
+        self.espera = espera
+        self._condicion = threading.Condition()
+        self._sucio = False
+        self._guardando = False
+        self._ultima_marca = 0.0
+        self._hilo = None
+        _PROGRAMADORES.add(self)
+
+    @property
+    def pendiente(self) -> bool:
+        """Indica si hay cambios que aún no llegaron a disco"""
+        return self._sucio or self._guardando
+
+    def marcar(self) -> None:
+        """Registra que hay cambios por guardar"""
+        with self._condicion:
+            self._sucio = True
+            if self.espera <= 0:
+                self._esperar_guardado_en_curso()
+                if self._sucio:
+                    self._ejecutar()
+                return
+            self._ultima_marca = time.monotonic()
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._bucle, name="guardado-diferido",
+                                              daemon=True)
+                self._hilo.start()
+            self._condicion.notify_all()
+
+    def flush(self) -> None:
+        """Guarda ya lo pendiente y espera a que termine cualquier guardado en curso"""
+        with self._condicion:
+            self._esperar_guardado_en_curso()
+            if self._sucio:
+                self._ejecutar()
+
+    def detener(self) -> None:
+        """Vacía lo pendiente y deja de vigilar la salida del intérprete"""
+        self.flush()
+        _PROGRAMADORES.discard(self)
+
+    def _esperar_guardado_en_curso(self) -> None:
+        while self._guardando:
+            self._condicion.wait()
+
+    def _bucle(self) -> None:
+        with self._condicion:
+            while self._sucio:
+                # Cada marca nueva reinicia la ventana de espera
+                restante = self._ultima_marca + self.espera - time.monotonic()
+                while self._sucio and restante > 0:
+                    self._condicion.wait(restante)
+                    restante = self._ultima_marca + self.espera - time.monotonic()
+                self._esperar_guardado_en_curso()
+                if self._sucio:
+                    self._ejecutar()
+            # Sin nada pendiente el hilo termina y deja de retener al programador
+            self._hilo = None
+
+    def _ejecutar(self) -> None:
+        """Llama a guardar sin bloquear nuevas marcas (se invoca con la condición adquirida)"""
+        self._sucio = False
+        self._guardando = True
+        self._condicion.release()
+        try:
+            self._guardar()
+        except Exception as e:
+            print(f"Error en el guardado diferido: {e}")
+        finally:
+            self._condicion.acquire()
+            self._guardando = False
+            self._condicion.notify_all()
+
+
+class CerrojoDatos:
+    """
+    Cerrojo exclusivo entre procesos sobre los datos, con un contador de versión
+
+    Usa flock sobre un archivo junto a los datos; el archivo guarda además la
+    versión de los datos, que crece con cada escritura confirmada. Quien la
+    lee antes de validar sabe, al tomar el cerrojo, si otro proceso escribió
+    entretanto. El cerrojo es reentrante dentro de un mismo objeto.
+    """
+
+    _ANCHO = 20
+
+    def __init__(self, archivo: str):
+        self.archivo = archivo
+        self._lock = threading.RLock()
+        self._nivel = 0
+        self._descriptor: Optional[int] = None
+
+    @contextmanager
+    def adquirir(self) -> Iterator[None]:
+        """Sección crítica: excluye a otros procesos y a otros hilos de este objeto"""
+        with self._lock:
+            if self._nivel == 0:
+                self._descriptor = os.open(self.archivo, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._descriptor, fcntl.LOCK_EX)
+            self._nivel += 1
+            try:
+                yield
+            finally:
+                self._nivel -= 1
+                if self._nivel == 0:
+                    # Cerrar el descriptor también libera el flock
+                    os.close(self._descriptor)
+                    self._descriptor = None
+
+    def version(self) -> Optional[int]:
+        """
+        Versión actual de los datos (0 si nunca se escribió)
+        Puede leerse sin el cerrojo; retorna None si la lectura no es válida
+        """
+        try:
+            with open(self.archivo, 'rb') as f:
+                contenido = f.read(self._ANCHO + 1)
+        except FileNotFoundError:
+            return 0
+        try:
+            return int(contenido) if contenido.strip() else 0
+        except ValueError:
+            return None
+
+    def incrementar_version(self) -> int:
+        """Aumenta la versión en uno y la retorna (requiere el cerrojo)"""
+        if self._descriptor is None:
+            raise RuntimeError("incrementar_version requiere el cerrojo adquirido")
+        version = (self.version() or 0) + 1
+        # Ancho fijo: se sobrescribe en su sitio sin truncar. Sin fsync, porque
+        # solo coordina procesos vivos, que comparten la caché de páginas.
+        os.lseek(self._descriptor, 0, os.SEEK_SET)
+        os.write(self._descriptor, f"{version:0{self._ANCHO}d}\n".encode('ascii'))
+        return version
@@ -0,0 +1,108 @@
+# Motor de validación de restricciones compiladas
+
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from .models import Restriccion, TipoRestriccion
+
+# Regla compilada: (orden, tipo, recurso_relacionado, mensaje)
+ReglaCompilada = Tuple[int, TipoRestriccion, int, str]
+
+class MotorRestricciones:
+    """
+    Restricciones indexadas por el recurso que las activa
+
+    Cada restricción se compila una sola vez. Al validar solo se revisan las
+    reglas de los recursos solicitados, con pertenencia sobre un set, y se
+    devuelven todas las violaciones de una pasada.
+
+    Los co-requisitos y las dependencias forman además un grafo "requiere"
+    cuyo cierre transitivo se precalcula al compilar, de modo que validar
+    una dependencia o sugerir recursos faltantes es una consulta directa.
+    """
+
+    def __init__(self, restricciones: List[Restriccion]):
+        self._por_recurso: Dict[int, List[ReglaCompilada]] = {}
+        self._requiere: Dict[int, Set[int]] = {}
+
+        for orden, restriccion in enumerate(restricciones):
+            self._compilar(orden, restriccion)
+
+        self._cierre: Dict[int, FrozenSet[int]] = {
+            recurso_id: self._alcanzables(recurso_id) for recurso_id in self._requiere
+        }
+        self.ciclos: List[List[int]] = self._detectar_ciclos()
+
+    def _compilar(self, orden: int, restriccion: Restriccion) -> None:
+        """Registra la regla bajo el recurso cuya presencia la activa"""
+        r1, r2 = restriccion.recursos_involucrados[0], restriccion.recursos_involucrados[1]
+
+        if restriccion.tipo == TipoRestriccion.CO_REQUISITO:
+            mensaje = f"Violación de co-requisito: {restriccion.descripcion}"
+            self._requiere.setdefault(r1, set()).add(r2)
+        elif restriccion.tipo == TipoRestriccion.EXCLUSION:
+            mensaje = f"Violación de exclusión: {restriccion.descripcion}"
+        elif restriccion.tipo == TipoRestriccion.DEPENDENCIA:
+            # El primer recurso requiere todos los demás; se valida contra el cierre
+            mensaje = f"Violación de dependencia: {restriccion.descripcion}"
+            self._requiere.setdefault(r1, set()).update(restriccion.recursos_involucrados[1:])
+        else:
+            return
+
+        self._por_recurso.setdefault(r1, []).append((orden, restriccion.tipo, r2, mensaje))
+
+    def _alcanzables(self, origen: int) -> FrozenSet[int]:
+        """Recursos requeridos directa o indirectamente por origen"""
+        visitados: Set[int] = set()
+        pendientes = list(self._requiere.get(origen, ()))
+        while pendientes:
+            actual = pendientes.pop()
+            if actual in visitados:
+                continue
+            visitados.add(actual)
+            pendientes.extend(self._requiere.get(actual, ()))
+        return frozenset(visitados)
+
+    def _detectar_ciclos(self) -> List[List[int]]:
+        """Agrupa los recursos que se requieren mutuamente (dependencias circulares)"""
+        ciclos: List[List[int]] = []
+        asignados: Set[int] = set()
+        for recurso_id, alcanzables in self._cierre.items():
+            if recurso_id in asignados or recurso_id not in alcanzables:
+                continue
+            ciclo = sorted(r for r in alcanzables if recurso_id in self._cierre.get(r, ()))
+            asignados.update(ciclo)
+            ciclos.append(ciclo)
+        return ciclos
+
+    def requeridos_por(self, recurso_id: int) -> FrozenSet[int]:
+        """Cierre transitivo de los recursos que requiere un recurso"""
+        return self._cierre.get(recurso_id, frozenset())
+
+    def recursos_faltantes(self, recursos_solicitados: Iterable[int]) -> Set[int]:
+        """Recursos que habría que añadir para cubrir todas las dependencias"""
+        seleccion = set(recursos_solicitados)
+        faltantes: Set[int] = set()
+        for recurso_id in seleccion:
+            faltantes |= self.requeridos_por(recurso_id)
+        return faltantes - seleccion
+
+    def violaciones(self, recursos_solicitados: Iterable[int]) -> List[str]:
+        """Devuelve los mensajes de todas las restricciones incumplidas, en orden de definición"""
+        seleccion = set(recursos_solicitados)
+        encontradas: List[Tuple[int, str]] = []
+
+        for recurso_id in seleccion:
+            for orden, tipo, relacionado, mensaje in self._por_recurso.get(recurso_id, ()):
+                if tipo == TipoRestriccion.CO_REQUISITO:
+                    if relacionado not in seleccion:
+                        encontradas.append((orden, mensaje))
+                elif tipo == TipoRestriccion.EXCLUSION:
+                    if relacionado in seleccion:
+                        encontradas.append((orden, mensaje))
+                else:
+                    faltantes = self.requeridos_por(recurso_id) - seleccion
+                    if faltantes:
+                        ids = ", ".join(str(r) for r in sorted(faltantes))
+                        encontradas.append((orden, f"{mensaje} (faltan recursos: {ids})"))
+
+        encontradas.sort()
+        return [mensaje for _, mensaje in encontradas]
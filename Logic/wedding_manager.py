@@ -1,32 +1,167 @@
 # Gestor principal del sistema
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Tuple, Optional
+from datetime import datetime, timedelta, time
+from contextlib import nullcontext
+from typing import Callable, Iterable, List, Dict, Tuple, Optional, Iterator, Set, Sequence, Union
+import math
 import os
-import json
+import threading
+import time as cronometro
 from .models import Recurso, Evento, Restriccion, EstadoEvento, TipoRecurso, TipoRestriccion, TipoBoda
+from .calendario import IndiceInicios, huecos_libres
+from .busqueda import IndiceBusqueda
+from .restricciones import MotorRestricciones
+from .ocupacion import MatrizOcupacion, GrupoRecursos, NUMPY_DISPONIBLE
+from .almacenamiento import Almacenamiento, crear_almacenamiento
+from .persistencia import CerrojoDatos, ProgramadorGuardado, serializar_binario
+from .codec import (codificar_datos, decodificar_datos, evento_desde_dict, recurso_desde_dict,
+                    restriccion_desde_dict, reservas_desde_eventos)
+from .config import ConfiguracionApp
+
+MENSAJE_CONFLICTO = "Los datos cambiaron en otro proceso mientras se guardaba; inténtalo de nuevo"
 
 class DreamWeddingPlanner:
     """Gestor principal de la aplicación"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", umbral_compactacion: Optional[int] = None,
+                 almacenamiento: Union[str, Almacenamiento, None] = None,
+                 espera_guardado: Optional[float] = None,
+                 coordinar: Optional[bool] = None):
+        """
+        Args:
+            data_dir: Carpeta de los archivos de datos
+            umbral_compactacion: Registros del diario JSON antes de reescribir la instantánea
+            almacenamiento: Backend ('json', 'sqlite' o una instancia de Almacenamiento)
+            espera_guardado: Segundos para agrupar cambios antes de guardarlos (0: al instante);
+                             sin efecto si coordinar es True
+            coordinar: Confirmar cada cambio bajo un cerrojo entre procesos
+                       (por defecto: ConfiguracionApp.COORDINAR_PROCESOS)
+        """
         self.data_dir = data_dir
+        os.makedirs(self.data_dir, exist_ok=True)
+        if umbral_compactacion is None:
+            umbral_compactacion = ConfiguracionApp.UMBRAL_COMPACTACION
+        if not isinstance(almacenamiento, Almacenamiento):
+            almacenamiento = crear_almacenamiento(
+                almacenamiento or ConfiguracionApp.ALMACENAMIENTO, data_dir, umbral_compactacion
+            )
+        self.almacenamiento = almacenamiento
+        # Los cambios se acumulan y un hilo los guarda agrupados tras la espera;
+        # _lock protege el estado en memoria y _lock_guardado serializa las escrituras
+        self._lock = threading.RLock()
+        self._lock_guardado = threading.RLock()
+        self._cambios_pendientes: List[Dict] = []
+        if espera_guardado is None:
+            espera_guardado = ConfiguracionApp.ESPERA_GUARDADO
+        self._guardado = ProgramadorGuardado(self._guardar_pendientes, espera_guardado)
+        # Con coordinación, cada cambio se escribe al confirmarse si la versión de
+        # los datos no avanzó desde la última sincronización
+        if coordinar is None:
+            coordinar = ConfiguracionApp.COORDINAR_PROCESOS
+        self.coordinar = coordinar
+        self._cerrojo = CerrojoDatos(os.path.join(data_dir, "weddings.lock"))
+        self._version_datos: Optional[int] = None
+        # Serializa validar-confirmar entre hilos: un deshacer no debe pisar otra mutación
+        self._lock_mutacion = threading.RLock()
         self.recursos: List[Recurso] = []
         self.eventos: List[Evento] = []
-        self.restricciones: List[Restriccion] = []
+        # Restricciones compiladas y número de reglas con que se compilaron; la
+        # propiedad `restricciones` descarta el motor al reasignarlas
+        self._motor_restricciones: Optional[MotorRestricciones] = None
+        self._reglas_motor = 0
+        self._restricciones: List[Restriccion] = []
         self.proximo_id_evento = 1
+        # Índices id -> objeto para búsquedas en O(1)
+        self._recursos_por_id: Dict[int, Recurso] = {}
+        self._eventos_por_id: Dict[int, Evento] = {}
+        # Eventos ordenados por inicio para las consultas por rango de fechas
+        self._indice_inicios = IndiceInicios()
+        # Agregados de las estadísticas: estado -> [eventos, suma de presupuestos]
+        self._agregados: Dict[EstadoEvento, List] = {}
+        self._recursos_disponibles = 0
+        # Índices secundarios estado / tipo de boda -> IDs de eventos
+        self._ids_por_estado: Dict[EstadoEvento, Set[int]] = {}
+        self._ids_por_tipo: Dict[TipoBoda, Set[int]] = {}
+        # Matriz de ocupación (NumPy), se construye con la primera consulta
+        self._matriz_ocupacion: Optional[MatrizOcupacion] = None
+        # Índice de texto de eventos y recursos, se construye con la primera búsqueda
+        self._indice_busqueda: Optional[IndiceBusqueda] = None
+        # Segundos empleados en cada fase de la última carga
+        self.tiempos_carga: Dict[str, float] = {}
         self._cargar_datos()
     
     def _cargar_datos(self):
-        """Carga datos iniciales o desde archivo"""
-        os.makedirs(self.data_dir, exist_ok=True)
-        data_file = os.path.join(self.data_dir, "weddings.json")
+        """Carga datos iniciales o desde el almacenamiento"""
+        marcas = [cronometro.perf_counter()]
+        # La versión se lee antes: si alguien escribe durante la carga, la primera
+        # confirmación lo detectará y sincronizará
+        self._version_datos = self._leer_version()
+        datos = None
+        # La instantánea binaria, si está al día, evita leer y decodificar el JSON
+        registros = self._cargar_binario()
+        if registros is None:
+            registros = []
+            try:
+                cargado = self.almacenamiento.cargar()
+            except Exception as e:
+                # No se guarda nada para no sobrescribir los datos que fallaron al leerse
+                print(f"Error cargando datos: {e}")
+                self._crear_datos_iniciales()
+            else:
+                if cargado is None:
+                    self._crear_datos_iniciales()
+                    self.compactar()
+                else:
+                    datos, registros = cargado
+        marcas.append(cronometro.perf_counter())
         
-        if os.path.exists(data_file):
-            self._cargar_desde_json(data_file)
-        else:
-            self._crear_datos_iniciales()
-            self._guardar_json(data_file)
+        if datos is not None:
+            self._cargar_desde_dict(datos)
+        marcas.append(cronometro.perf_counter())
+        
+        self._reconstruir_indices()
+        marcas.append(cronometro.perf_counter())
+        
+        # Reproducir los cambios posteriores a la instantánea
+        for registro in registros:
+            self._aplicar_registro(registro)
+        marcas.append(cronometro.perf_counter())
+        
+        fases = ('lectura', 'decodificacion', 'indices', 'diario')
+        self.tiempos_carga = {fase: fin - inicio for fase, inicio, fin in zip(fases, marcas, marcas[1:])}
+        self.tiempos_carga['total'] = marcas[-1] - marcas[0]
+    
+    def _cargar_binario(self) -> Optional[List[Dict]]:
+        """
+        Carga el estado desde la instantánea binaria del almacenamiento
+        Retorna los registros del diario por reproducir, o None si no hay instantánea utilizable
+        """
+        if not ConfiguracionApp.INSTANTANEA_BINARIA:
+            return None
+        cargado = self.almacenamiento.cargar_binario()
+        if cargado is None:
+            return None
+        
+        estado, registros = cargado
+        if not (isinstance(estado, tuple) and len(estado) == 3
+                and all(isinstance(lista, list) for lista in estado)):
+            print("Aviso: instantánea binaria con contenido inesperado; se usa el JSON")
+            return None
+        
+        self.recursos, self.eventos, self.restricciones = estado
+        if self.eventos:
+            self.proximo_id_evento = max(e.id for e in self.eventos) + 1
+        return registros
+    
+    def _reconstruir_indices(self):
+        """Reconstruye los índices por ID tras cargar o reemplazar las listas"""
+        self._recursos_por_id = {r.id: r for r in self.recursos}
+        self._eventos_por_id = {e.id: e for e in self.eventos}
+        self._indice_inicios = IndiceInicios((e.id, e.inicio) for e in self.eventos)
+        self._recalcular_agregados()
+        self.invalidar_restricciones()
+        self._matriz_ocupacion = None
+        self._indice_busqueda = None
     
     def _crear_datos_iniciales(self):
         """Crea datos iniciales predeterminados"""
@@ -83,102 +218,508 @@ class DreamWeddingPlanner:
             ),
         ]
     
-    def _cargar_desde_json(self, archivo: str):
-        """Carga datos desde archivo JSON"""
+    def _cargar_desde_dict(self, data: Dict):
+        """Carga datos desde un diccionario en formato normalizado o en el formato 1"""
         try:
-            with open(archivo, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Cargar recursos
-            self.recursos = []
-            for r in data.get('recursos', []):
-                recurso = Recurso(
-                    id=r['id'],
-                    nombre=r['nombre'],
-                    tipo=TipoRecurso(r['tipo']),
-                    capacidad=r.get('capacidad', 1),
-                    precio=r.get('precio', 0.0),
-                    disponible=r.get('disponible', True),
-                    descripcion=r.get('descripcion', '')
-                )
-                if 'eventos_asignados' in r:
-                    recurso.eventos_asignados = [
-                        (eid, datetime.fromisoformat(inicio), datetime.fromisoformat(fin))
-                        for eid, inicio, fin in r['eventos_asignados']
-                    ]
-                self.recursos.append(recurso)
-            
-            # Cargar eventos
-            self.eventos = []
-            for e in data.get('eventos', []):
-                evento = Evento(
-                    id=e['id'],
-                    nombre=e['nombre'],
-                    inicio=datetime.fromisoformat(e['inicio']),
-                    fin=datetime.fromisoformat(e['fin']),
-                    recursos_solicitados=e['recursos_solicitados'],
-                    descripcion=e.get('descripcion', ''),
-                    tipo_boda=TipoBoda(e.get('tipo_boda', 'Personalizada')),
-                    presupuesto=e.get('presupuesto', 0.0),
-                    estado=EstadoEvento(e.get('estado', EstadoEvento.PENDIENTE.value)),
-                    num_invitados=e.get('num_invitados', 0),
-                    fecha_creacion=datetime.fromisoformat(e.get('fecha_creacion', datetime.now().isoformat()))
-                )
-                self.eventos.append(evento)
-                if evento.id >= self.proximo_id_evento:
-                    self.proximo_id_evento = evento.id + 1
-            
-            # Cargar restricciones
-            self.restricciones = []
-            for r in data.get('restricciones', []):
-                restriccion = Restriccion(
-                    tipo=TipoRestriccion(r['tipo']),
-                    recursos_involucrados=r['recursos_involucrados'],
-                    descripcion=r['descripcion']
-                )
-                self.restricciones.append(restriccion)
-            
+            self.recursos, self.eventos, self.restricciones = decodificar_datos(data)
+            if self.eventos:
+                self.proximo_id_evento = max(self.proximo_id_evento,
+                                             max(e.id for e in self.eventos) + 1)
         except Exception as e:
             print(f"Error cargando datos: {e}")
             self._crear_datos_iniciales()
     
-    def _guardar_json(self, archivo: str) -> bool:
-        """Guarda datos en archivo JSON"""
-        try:
-            data = {
-                'recursos': [r.to_dict() for r in self.recursos],
-                'eventos': [e.to_dict() for e in self.eventos],
-                'restricciones': [r.to_dict() for r in self.restricciones]
-            }
+    def exportar_datos(self) -> Dict:
+        """Estado completo en el formato normalizado (las reservas solo van en los eventos)"""
+        return codificar_datos(self.recursos, self.eventos, self.restricciones)
+    
+    def reemplazar_datos(self, recursos: List[Recurso], eventos: List[Evento],
+                         restricciones: List[Restriccion]) -> bool:
+        """
+        Reemplaza todos los datos (también los archivados) y los guarda como instantánea completa
+        
+        Sin la instantánea, los guardados siguientes solo añadirían cambios al
+        diario y los datos reemplazados se perderían al reiniciar.
+        Retorna True si se guardaron.
+        """
+        with self._lock_mutacion:
+            # Lo pendiente se vacía antes de tomar los cerrojos que necesita el hilo de guardado
+            self.flush()
+            with self._seccion_critica(), self._lock_guardado:
+                # Lo guardado por otros procesos se incorpora antes: compactar no debe
+                # confundirlo con la memoria ya reemplazada
+                self.sincronizar()
+                self.cargar_historial()
+                with self._lock:
+                    self.recursos, self.eventos, self.restricciones = recursos, eventos, restricciones
+                    if eventos:
+                        self.proximo_id_evento = max(self.proximo_id_evento, max(e.id for e in eventos) + 1)
+                    self._reconstruir_indices()
+                return self.compactar()
+    
+    def compactar(self) -> bool:
+        """Guarda una instantánea completa del estado actual, incluidos los cambios pendientes"""
+        with self._seccion_critica(), self._lock_guardado:
+            # Una instantánea desfasada borraría lo que otros procesos guardaron
+            if self.coordinar and self._cerrojo.version() != self._version_datos:
+                self._refrescar()
+            with self._lock:
+                self._cambios_pendientes = []
+                datos = self.exportar_datos()
+                binario = None
+                if ConfiguracionApp.INSTANTANEA_BINARIA and self.almacenamiento.soporta_binario:
+                    binario = serializar_binario((self.recursos, self.eventos, self.restricciones))
+            try:
+                self.almacenamiento.guardar(datos)
+            except Exception as e:
+                print(f"Error guardando datos: {e}")
+                return False
+            self._avanzar_version()
             
-            with open(archivo, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # La copia binaria se escribe después: si falla, queda más antigua que el JSON
+            if binario is not None:
+                try:
+                    self.almacenamiento.guardar_binario(binario)
+                except Exception as e:
+                    print(f"Error guardando la instantánea binaria: {e}")
+            return True
+    
+    def _registrar_cambio(self, *registros: Dict) -> None:
+        """Encola las mutaciones para el próximo guardado agrupado"""
+        with self._lock:
+            self._cambios_pendientes.extend(registros)
+        self._guardado.marcar()
+    
+    def _guardar_pendientes(self) -> None:
+        """Persiste de una vez los cambios acumulados y compacta si el backend lo pide"""
+        with self._seccion_critica(), self._lock_guardado:
+            with self._lock:
+                registros, self._cambios_pendientes = self._cambios_pendientes, []
+            if registros:
+                try:
+                    self.almacenamiento.registrar(*registros)
+                except Exception as e:
+                    print(f"Error registrando cambios: {e}")
+                    self.compactar()
+                    return
+                self._avanzar_version()
             
+            if self.almacenamiento.requiere_compactacion:
+                self.compactar()
+    
+    def _seccion_critica(self):
+        """Cerrojo entre procesos si hay coordinación; si no, un contexto vacío"""
+        return self._cerrojo.adquirir() if self.coordinar else nullcontext()
+    
+    def _leer_version(self) -> Optional[int]:
+        return self._cerrojo.version() if self.coordinar else None
+    
+    def _anotar_version(self, version: Optional[int]) -> None:
+        """Recuerda la versión que refleja la memoria; nunca retrocede (None: desconocida)"""
+        if version is None or self._version_datos is None or version > self._version_datos:
+            self._version_datos = version
+    
+    def _avanzar_version(self) -> None:
+        """Anota una escritura propia (se llama con el cerrojo adquirido)"""
+        if self.coordinar:
+            self._version_datos = self._cerrojo.incrementar_version()
+    
+    def _persistir(self, *registros: Dict) -> bool:
+        """
+        Escribe mutaciones ya aplicadas en memoria
+        
+        Sin coordinación se encolan para el guardado agrupado. Con ella se
+        escriben ya, dentro del cerrojo, solo si ningún otro proceso escribió
+        desde la última sincronización; si lo hizo, retorna False.
+        """
+        if not self.coordinar:
+            self._registrar_cambio(*registros)
             return True
-        except Exception as e:
-            print(f"Error guardando datos: {e}")
-            return False
+        
+        with self._cerrojo.adquirir():
+            if self._cerrojo.version() != self._version_datos:
+                return False
+            with self._lock:
+                self._cambios_pendientes.extend(registros)
+            self._guardar_pendientes()
+        return True
+    
+    def _reintentar(self, intentar: Callable[[], Optional[Tuple]]) -> Optional[Tuple]:
+        """
+        Repite una operación (validar en memoria y confirmar) mientras choque con otros procesos
+        
+        Los primeros intentos son optimistas: se valida sin el cerrojo y solo se
+        toma para escribir. El último valida con el cerrojo ya tomado, así que
+        nadie puede adelantarse. `intentar` retorna None si hubo conflicto.
+        """
+        with self._lock_mutacion:
+            for _ in range(ConfiguracionApp.INTENTOS_ESCRITURA):
+                resultado = intentar()
+                if resultado is not None:
+                    return resultado
+            with self._seccion_critica():
+                self.sincronizar()
+                return intentar()
+    
+    def _confirmar(self, registros: List[Dict], deshacer: Callable[[], None]) -> bool:
+        """
+        Persiste mutaciones ya aplicadas en memoria o, si hay conflicto, las deshace
+        
+        Tras un conflicto se sincroniza para que el llamador vuelva a validar
+        con los datos al día. Retorna True si los cambios quedaron guardados.
+        """
+        if self._persistir(*registros):
+            return True
+        with self._lock:
+            deshacer()
+        self.sincronizar()
+        return False
+    
+    def flush(self) -> None:
+        """Escribe ya los cambios pendientes sin esperar al guardado agrupado"""
+        self._guardado.flush()
+    
+    def cerrar(self) -> None:
+        """Guarda lo pendiente y libera el almacenamiento"""
+        self._guardado.detener()
+        self.almacenamiento.cerrar()
+    
+    def sincronizar(self) -> int:
+        """
+        Incorpora los cambios que otros procesos guardaron desde la última lectura
+        
+        La comprobación es barata (fecha, tamaño o versión de los archivos); si
+        hay cambios solo se aplican los registros nuevos del diario o los
+        eventos que difieren de la instantánea, sin reconstruir todo.
+        
+        Returns:
+            Número de registros o eventos aplicados
+        """
+        version = self._leer_version()
+        if not self.almacenamiento.cambios_externos():
+            self._anotar_version(version)
+            return 0
+        # Lo pendiente debe llegar a disco antes: si no, la comparación con la
+        # instantánea lo tomaría por borrado
+        self.flush()
+        return self._refrescar()
+    
+    def _refrescar(self) -> int:
+        """Aplica lo que guardaron otros procesos, sin vaciar antes lo pendiente"""
+        version = self._leer_version()
+        with self._lock_guardado:
+            with self._lock:
+                cambios = self.almacenamiento.refrescar()
+                self._anotar_version(version)
+                if cambios is None:
+                    return 0
+                
+                datos, registros = cambios
+                aplicados = self._aplicar_diferencias(datos) if datos is not None else 0
+                for registro in registros:
+                    self._aplicar_registro(registro)
+                return aplicados + len(registros)
+    
+    def _aplicar_diferencias(self, datos: Dict) -> int:
+        """
+        Ajusta la memoria a una instantánea nueva tocando solo lo que cambió
+        
+        Si la instantánea trae 'rangos', solo se comparan los eventos que
+        empiezan en ellos; los demás no cambiaron.
+        """
+        en_disco = {e['id']: e for e in datos.get('eventos', [])}
+        rangos = datos.get('rangos')
+        if rangos is None:
+            en_memoria = list(self.eventos)
+        else:
+            # Los rangos son semiabiertos y en_rango() incluye el extremo final
+            en_memoria = [
+                self._eventos_por_id[evento_id]
+                for desde, hasta in rangos
+                for evento_id in self._indice_inicios.en_rango(desde, hasta - timedelta(microseconds=1))
+            ]
+        cambios = 0
+        for evento in en_memoria:
+            nuevo = en_disco.get(evento.id)
+            if nuevo is None or nuevo != evento.to_dict():
+                self._descartar_evento(evento)
+                cambios += 1
+        for evento_id, nuevo in en_disco.items():
+            if evento_id not in self._eventos_por_id:
+                self._incorporar_evento(evento_desde_dict(nuevo))
+                cambios += 1
+        
+        # Recursos y restricciones son pocos: si cambian se reemplazan enteros
+        if [r.to_dict(incluir_reservas=False) for r in self.recursos] != datos.get('recursos', []):
+            reservas = reservas_desde_eventos(self.eventos)
+            self.recursos = [recurso_desde_dict(r, reservas.get(r['id'], []))
+                             for r in datos.get('recursos', [])]
+            self._reconstruir_indices()
+            cambios += 1
+        if [r.to_dict() for r in self.restricciones] != datos.get('restricciones', []):
+            self.restricciones = [restriccion_desde_dict(r) for r in datos.get('restricciones', [])]
+            cambios += 1
+        return cambios
+    
+    def cargar_historial(self, desde: Optional[datetime] = None,
+                         hasta: Optional[datetime] = None) -> int:
+        """
+        Trae a memoria los eventos archivados que el almacenamiento no cargó al inicio
+        
+        Args:
+            desde: Inicio del rango que se va a consultar (por defecto: sin límite)
+            hasta: Fin del rango que se va a consultar (por defecto: sin límite)
+        
+        Returns:
+            Número de eventos incorporados
+        """
+        with self._lock_guardado:
+            with self._lock:
+                nuevos = [
+                    evento for evento in map(evento_desde_dict,
+                                             self.almacenamiento.cargar_particiones(desde, hasta))
+                    if evento.id not in self._eventos_por_id
+                ]
+                if not nuevos:
+                    return 0
+                
+                # Los calendarios se reconstruyen de una vez en lugar de insertar reserva a reserva
+                self.eventos = sorted(self.eventos + nuevos, key=lambda e: e.id)
+                reservas = reservas_desde_eventos(self.eventos)
+                for recurso in self.recursos:
+                    recurso.eventos_asignados = reservas.get(recurso.id, [])
+                self.proximo_id_evento = max(self.proximo_id_evento, self.eventos[-1].id + 1)
+                self._reconstruir_indices()
+                return len(nuevos)
+    
+    def migrar_almacenamiento(self, destino: Almacenamiento) -> Tuple[bool, str]:
+        """
+        Copia todos los datos a otro backend y pasa a usarlo
+        Retorna (exito, mensaje)
+        """
+        self.cargar_historial()
+        self.flush()
+        with self._lock_guardado:
+            try:
+                with self._lock:
+                    datos = self.exportar_datos()
+                destino.guardar(datos)
+            except Exception as e:
+                return False, f"Error migrando datos a {destino.nombre}: {e}"
+            
+            origen = self.almacenamiento
+            self.almacenamiento = destino
+            origen.cerrar()
+        return True, (f"Migrados {len(self.recursos)} recursos, {len(self.eventos)} eventos y "
+                      f"{len(self.restricciones)} restricciones de {origen.nombre} a {destino.nombre}")
+    
+    def _aplicar_registro(self, registro: Dict) -> None:
+        """Reproduce un registro del diario; los ya aplicados se ignoran"""
+        operacion = registro.get('op')
+        try:
+            if operacion == 'crear_evento':
+                evento = evento_desde_dict(registro['evento'])
+                if evento.id not in self._eventos_por_id:
+                    self._incorporar_evento(evento)
+            elif operacion == 'eliminar_evento':
+                evento = self._eventos_por_id.get(registro['id'])
+                if evento:
+                    self._descartar_evento(evento)
+            elif operacion == 'cambiar_estado':
+                evento = self._eventos_por_id.get(registro['id'])
+                if evento:
+                    self._aplicar_estado(evento, EstadoEvento(registro['estado']))
+            else:
+                print(f"Aviso: operación desconocida en el diario: {operacion}")
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Aviso: registro del diario inválido ({e}): {registro}")
     
     def validar_restricciones(self, recursos_solicitados: List[int]) -> Tuple[bool, str]:
         """
         Valida que los recursos cumplan todas las restricciones
-        Retorna (es_valido, mensaje_error)
+        Retorna (es_valido, mensaje_error) con todas las violaciones encontradas
         """
-        for restriccion in self.restricciones:
-            es_valido, mensaje = restriccion.valida_para(recursos_solicitados)
-            if not es_valido:
-                return False, mensaje
+        violaciones = self.obtener_violaciones(recursos_solicitados)
+        if violaciones:
+            return False, "; ".join(violaciones)
         
         return True, "Restricciones validadas correctamente"
     
+    def obtener_violaciones(self, recursos_solicitados: List[int]) -> List[str]:
+        """Devuelve la lista de restricciones incumplidas por los recursos"""
+        return self._obtener_motor_restricciones().violaciones(recursos_solicitados)
+    
+    def sugerir_recursos_requeridos(self, recursos_solicitados: List[int]) -> List[int]:
+        """IDs de los recursos que faltan para cumplir co-requisitos y dependencias"""
+        return sorted(self._obtener_motor_restricciones().recursos_faltantes(recursos_solicitados))
+    
+    def obtener_ciclos_dependencia(self) -> List[List[int]]:
+        """Grupos de recursos con dependencias circulares entre sí"""
+        return self._obtener_motor_restricciones().ciclos
+    
+    @property
+    def restricciones(self) -> List[Restriccion]:
+        """
+        Restricciones entre recursos
+        
+        Reasignar la lista descarta el motor compilado; añadir o quitar
+        elementos en el sitio también se detecta, pero tras modificar una
+        restricción existente hay que llamar a invalidar_restricciones.
+        """
+        return self._restricciones
+    
+    @restricciones.setter
+    def restricciones(self, restricciones: List[Restriccion]) -> None:
+        self._restricciones = restricciones
+        self.invalidar_restricciones()
+    
+    def agregar_restriccion(self, restriccion: Restriccion) -> Tuple[bool, str]:
+        """Añade una restricción y guarda una instantánea con ella"""
+        with self._lock_mutacion:
+            self.flush()
+            with self._seccion_critica(), self._lock_guardado:
+                self.sincronizar()
+                with self._lock:
+                    self.restricciones = self.restricciones + [restriccion]
+                if not self.compactar():
+                    return False, "Error guardando la restricción"
+        return True, "Restricción agregada exitosamente"
+    
+    def eliminar_restriccion(self, indice: int) -> Tuple[bool, str]:
+        """Elimina la restricción en esa posición y guarda una instantánea sin ella"""
+        with self._lock_mutacion:
+            self.flush()
+            with self._seccion_critica(), self._lock_guardado:
+                self.sincronizar()
+                with self._lock:
+                    if not 0 <= indice < len(self.restricciones):
+                        return False, "Restricción no encontrada"
+                    self.restricciones = self.restricciones[:indice] + self.restricciones[indice + 1:]
+                if not self.compactar():
+                    return False, "Error guardando los cambios"
+        return True, "Restricción eliminada exitosamente"
+    
+    def invalidar_restricciones(self):
+        """Fuerza la recompilación tras modificar restricciones ya existentes"""
+        self._motor_restricciones = None
+    
+    def _obtener_motor_restricciones(self) -> MotorRestricciones:
+        """Devuelve el motor compilado, compilándolo si las restricciones cambiaron"""
+        motor = self._motor_restricciones
+        if motor is None or self._reglas_motor != len(self._restricciones):
+            motor = self._motor_restricciones = MotorRestricciones(self._restricciones)
+            self._reglas_motor = len(self._restricciones)
+        return motor
+    
     def crear_evento(self, nombre: str, inicio: datetime, fin: datetime,
                     recursos: List[int], tipo_boda: TipoBoda = TipoBoda.PERSONALIZADA,
                     presupuesto: float = 0.0, descripcion: str = "",
-                    num_invitados: int = 0) -> Tuple[bool, str, Optional[int]]:
+                    num_invitados: int = 0,
+                    unidades: Optional[Dict[int, int]] = None) -> Tuple[bool, str, Optional[int]]:
         """
         Crea un nuevo evento de boda
+        `unidades` indica cuántas unidades pedir de los recursos multiunidad (1 por defecto)
         Retorna (exito, mensaje, id_evento)
         """
+        def intentar():
+            with self._lock:
+                exito, mensaje, evento_id = self._registrar_evento(
+                    nombre, inicio, fin, recursos, tipo_boda, presupuesto, descripcion, num_invitados,
+                    unidades
+                )
+                if not exito:
+                    return exito, mensaje, evento_id
+                registro = self._registro_creacion(evento_id)
+            
+            # Guardar cambios
+            if self._confirmar([registro], lambda: self._revertir_creacion([evento_id])):
+                return exito, mensaje, evento_id
+            return None
+        
+        self.sincronizar()
+        return self._reintentar(intentar) or (False, MENSAJE_CONFLICTO, None)
+    
+    def crear_eventos_lote(self, solicitudes: List[Dict],
+                           atomico: bool = True) -> List[Tuple[bool, str, Optional[int]]]:
+        """
+        Crea varios eventos y guarda el archivo una sola vez al final
+        
+        Args:
+            solicitudes: Lista de diccionarios con los argumentos de crear_evento
+            atomico: Si es True, un fallo revierte todo el lote; si es False,
+                     se conservan las solicitudes válidas
+        
+        Returns:
+            Lista con un (exito, mensaje, id_evento) por solicitud, en el mismo orden
+        """
+        def intentar():
+            with self._lock:
+                resultados, creados = self._registrar_lote(solicitudes, atomico)
+                registros = [self._registro_creacion(i) for i in creados]
+            
+            # Guardar cambios una sola vez
+            if not creados or self._confirmar(registros, lambda: self._revertir_creacion(creados)):
+                return resultados
+            return None
+        
+        self.sincronizar()
+        return self._reintentar(intentar) or [(False, MENSAJE_CONFLICTO, None) for _ in solicitudes]
+    
+    def _registrar_lote(self, solicitudes: List[Dict],
+                        atomico: bool) -> Tuple[List[Tuple[bool, str, Optional[int]]], List[int]]:
+        """
+        Valida y registra en memoria las solicitudes de un lote
+        Retorna (resultados, IDs creados)
+        """
+        resultados: List[Tuple[bool, str, Optional[int]]] = []
+        creados: List[int] = []
+        
+        for indice, solicitud in enumerate(solicitudes):
+            try:
+                resultado = self._registrar_evento(**solicitud)
+            except (TypeError, ValueError) as e:
+                resultado = (False, f"Solicitud inválida: {e}", None)
+            
+            exito, mensaje, evento_id = resultado
+            if exito:
+                creados.append(evento_id)
+                resultados.append(resultado)
+                continue
+            
+            resultados.append(resultado)
+            if atomico:
+                # Revertir lo creado en orden inverso y descartar el resto
+                self._revertir_creacion(creados)
+                motivo = f"lote cancelado por la solicitud {indice + 1}"
+                resultados = [
+                    (False, f"Revertido: {motivo}", None) if r[0] else r
+                    for r in resultados
+                ]
+                resultados.extend(
+                    (False, f"No procesada: {motivo}", None)
+                    for _ in solicitudes[indice + 1:]
+                )
+                return resultados, []
+        
+        return resultados, creados
+    
+    def _revertir_creacion(self, creados: List[int]) -> None:
+        """Deshace en memoria, en orden inverso, eventos recién creados y sus IDs"""
+        for evento_id in reversed(creados):
+            self._descartar_evento(self.obtener_evento_por_id(evento_id))
+        if creados:
+            self.proximo_id_evento = min(creados)
+    
+    def _registrar_evento(self, nombre: str, inicio: datetime, fin: datetime,
+                          recursos: List[int], tipo_boda: TipoBoda = TipoBoda.PERSONALIZADA,
+                          presupuesto: float = 0.0, descripcion: str = "",
+                          num_invitados: int = 0,
+                          unidades: Optional[Dict[int, int]] = None) -> Tuple[bool, str, Optional[int]]:
+        """
+        Valida y registra un evento en memoria, sin guardar en disco
+        Retorna (exito, mensaje, id_evento)
+        """
+        unidades = {rid: n for rid, n in (unidades or {}).items() if rid in recursos}
         
         # Validar fechas
         if inicio >= fin:
@@ -192,12 +733,20 @@ class DreamWeddingPlanner:
             recurso = self._obtener_recurso(recurso_id)
             if not recurso:
                 return False, f"Recurso ID {recurso_id} no encontrado", None
+            if unidades.get(recurso_id, 1) < 1:
+                return False, f"Unidades inválidas para el recurso '{recurso.nombre}'", None
         
         # Validar disponibilidad de recursos
         for recurso_id in recursos:
             recurso = self._obtener_recurso(recurso_id)
-            if not recurso.esta_disponible(inicio, fin):
+            solicitadas = unidades.get(recurso_id, 1)
+            if not recurso.esta_disponible(inicio, fin, solicitadas):
                 conflictos = self._obtener_conflictos_recurso(recurso_id, inicio, fin)
+                if recurso.unidades_totales > 1:
+                    libres = recurso.unidades_libres(inicio, fin)
+                    return False, (f"Recurso '{recurso.nombre}' sin unidades suficientes "
+                                   f"(libres: {libres}, solicitadas: {solicitadas}). "
+                                   f"Conflictos: {conflictos}"), None
                 return False, f"Recurso '{recurso.nombre}' no disponible. Conflictos: {conflictos}", None
         
         # Validar restricciones
@@ -216,47 +765,142 @@ class DreamWeddingPlanner:
             presupuesto=presupuesto,
             descripcion=descripcion,
             num_invitados=num_invitados,
-            estado=EstadoEvento.CONFIRMADO
+            estado=EstadoEvento.CONFIRMADO,
+            unidades_solicitadas={rid: n for rid, n in unidades.items() if n != 1}
         )
         
-        # Asignar recursos
-        for recurso_id in recursos:
+        self._incorporar_evento(evento)
+        
+        return True, f"Evento '{nombre}' creado exitosamente con ID {evento.id}", evento.id
+    
+    def _incorporar_evento(self, evento: Evento) -> None:
+        """Asigna los recursos de un evento ya validado y lo indexa en memoria"""
+        for recurso_id in evento.recursos_solicitados:
             recurso = self._obtener_recurso(recurso_id)
             if recurso:
-                recurso.asignar_evento(evento.id, inicio, fin)
+                unidades = evento.unidades_solicitadas.get(recurso_id, 1)
+                if not recurso.asignar_evento(evento.id, evento.inicio, evento.fin, unidades):
+                    print(f"Aviso: el recurso '{recurso.nombre}' no pudo asignarse al evento {evento.id}")
+        self._actualizar_matriz_ocupacion(evento, 1)
+        if self._indice_busqueda is not None:
+            self._indice_busqueda.agregar(('evento', evento.id), evento.nombre, evento.descripcion)
         
         self.eventos.append(evento)
-        evento_id = self.proximo_id_evento
-        self.proximo_id_evento += 1
-        
-        # Guardar cambios
-        self._guardar_json(os.path.join(self.data_dir, "weddings.json"))
-        
-        return True, f"Evento '{nombre}' creado exitosamente con ID {evento_id}", evento_id
+        self._eventos_por_id[evento.id] = evento
+        self._indice_inicios.agregar(evento.id, evento.inicio)
+        self._contabilizar(evento, 1)
+        if evento.id >= self.proximo_id_evento:
+            self.proximo_id_evento = evento.id + 1
+    
+    def _registro_creacion(self, evento_id: int) -> Dict:
+        """Registro del diario para un evento recién creado"""
+        return {'op': 'crear_evento', 'evento': self._eventos_por_id[evento_id].to_dict()}
     
     def eliminar_evento(self, evento_id: int) -> Tuple[bool, str]:
         """Elimina un evento y libera sus recursos"""
-        evento = self.obtener_evento_por_id(evento_id)
-        if not evento:
-            return False, f"Evento ID {evento_id} no encontrado"
+        self.sincronizar()
+        if evento_id not in self._eventos_por_id and self.almacenamiento.historial_pendiente:
+            # Puede estar en una partición archivada que aún no se cargó
+            self.cargar_historial()
+        
+        def intentar():
+            with self._lock:
+                evento = self.obtener_evento_por_id(evento_id)
+                if not evento:
+                    return False, f"Evento ID {evento_id} no encontrado"
+                
+                self._descartar_evento(evento)
+            
+            # Guardar cambios (el inicio permite al backend localizar la partición)
+            registro = {'op': 'eliminar_evento', 'id': evento_id, 'inicio': evento.inicio.isoformat()}
+            if self._confirmar([registro], lambda: self._incorporar_evento(evento)):
+                return True, f"Evento '{evento.nombre}' eliminado exitosamente"
+            return None
         
+        return self._reintentar(intentar) or (False, MENSAJE_CONFLICTO)
+    
+    def _descartar_evento(self, evento: Evento) -> None:
+        """Libera los recursos de un evento y lo quita de memoria"""
         # Liberar recursos
         for recurso_id in evento.recursos_solicitados:
             recurso = self._obtener_recurso(recurso_id)
             if recurso:
-                recurso.liberar_evento(evento_id)
+                recurso.liberar_evento(evento.id, evento.inicio)
+        self._actualizar_matriz_ocupacion(evento, -1)
+        if self._indice_busqueda is not None:
+            self._indice_busqueda.quitar(('evento', evento.id))
         
         # Eliminar evento
-        self.eventos = [e for e in self.eventos if e.id != evento_id]
+        self.eventos = [e for e in self.eventos if e.id != evento.id]
+        if self._eventos_por_id.pop(evento.id, None) is not None:
+            self._indice_inicios.quitar(evento.id, evento.inicio)
+            self._contabilizar(evento, -1)
+    
+    def cambiar_estado_evento(self, evento_id: int, nuevo_estado: EstadoEvento) -> Tuple[bool, str]:
+        """
+        Cambia el estado de un evento y lo guarda
+        Retorna (exito, mensaje)
+        """
+        self.sincronizar()
+        if evento_id not in self._eventos_por_id and self.almacenamiento.historial_pendiente:
+            self.cargar_historial()
         
-        # Guardar cambios
-        self._guardar_json(os.path.join(self.data_dir, "weddings.json"))
+        def intentar():
+            with self._lock:
+                evento = self.obtener_evento_por_id(evento_id)
+                if not evento:
+                    return False, f"Evento ID {evento_id} no encontrado"
+                anterior = evento.estado
+                if anterior == nuevo_estado:
+                    return True, f"El evento '{evento.nombre}' ya está {nuevo_estado.value}"
+                
+                self._aplicar_estado(evento, nuevo_estado)
+            
+            registro = {'op': 'cambiar_estado', 'id': evento_id, 'estado': nuevo_estado.value,
+                        'inicio': evento.inicio.isoformat()}
+            if self._confirmar([registro], lambda: self._aplicar_estado(evento, anterior)):
+                return True, f"Evento '{evento.nombre}' marcado como {nuevo_estado.value}"
+            return None
         
-        return True, f"Evento '{evento.nombre}' eliminado exitosamente"
+        return self._reintentar(intentar) or (False, MENSAJE_CONFLICTO)
+    
+    def _aplicar_estado(self, evento: Evento, estado: EstadoEvento) -> None:
+        """Cambia el estado de un evento en memoria manteniendo los agregados"""
+        self._contabilizar(evento, -1)
+        evento.cambiar_estado(estado)
+        self._contabilizar(evento, 1)
+    
+    def _contabilizar(self, evento: Evento, signo: int) -> None:
+        """Suma (signo 1) o resta (signo -1) un evento de los agregados e índices por estado y tipo"""
+        ids_estado = self._ids_por_estado.setdefault(evento.estado, set())
+        ids_tipo = self._ids_por_tipo.setdefault(evento.tipo_boda, set())
+        if signo > 0:
+            ids_estado.add(evento.id)
+            ids_tipo.add(evento.id)
+        else:
+            ids_estado.discard(evento.id)
+            ids_tipo.discard(evento.id)
+        
+        acumulado = self._agregados.setdefault(evento.estado, [0, 0.0])
+        acumulado[0] += signo
+        acumulado[1] += signo * evento.presupuesto
+        if acumulado[0] == 0:
+            # Sin eventos la suma vuelve a 0 exacto, sin residuos de coma flotante
+            acumulado[1] = 0.0
+    
+    def _recalcular_agregados(self) -> None:
+        """Recalcula los agregados y los índices por estado y tipo recorriendo todos los datos"""
+        self._agregados = {}
+        self._ids_por_estado = {}
+        self._ids_por_tipo = {}
+        for evento in self.eventos:
+            self._contabilizar(evento, 1)
+        self._recursos_disponibles = sum(1 for r in self.recursos if r.disponible)
     
     def buscar_horario_disponible(self, recursos: List[int], duracion: timedelta,
                                   fecha_inicio: datetime = None,
-                                  fecha_limite: datetime = None) -> Optional[Tuple[datetime, datetime]]:
+                                  fecha_limite: datetime = None,
+                                  unidades: Optional[Dict[int, int]] = None) -> Optional[Tuple[datetime, datetime]]:
         """
         Encuentra el próximo horario disponible para los recursos solicitados
         
@@ -265,42 +909,209 @@ class DreamWeddingPlanner:
             duracion: Duración del evento
             fecha_inicio: Fecha desde donde empezar a buscar (por defecto: ahora)
             fecha_limite: Fecha límite para la búsqueda (por defecto: 1 año)
+            unidades: Unidades requeridas por recurso multiunidad (por defecto: 1)
         
         Returns:
             Tupla (inicio, fin) del horario encontrado, o None si no hay disponibilidad
         """
+        horarios = self.iterar_horarios_disponibles(recursos, duracion, fecha_inicio,
+                                                    fecha_limite, uno_por_dia=False,
+                                                    unidades=unidades)
+        return next(horarios, None)
+    
+    def buscar_horarios_disponibles(self, recursos: List[int], duracion: timedelta,
+                                    cantidad: int = 5, **filtros) -> List[Tuple[datetime, datetime]]:
+        """
+        Devuelve hasta `cantidad` horarios disponibles en una sola pasada
+        
+        Acepta los mismos filtros que iterar_horarios_disponibles
+        """
+        horarios = []
+        for horario in self.iterar_horarios_disponibles(recursos, duracion, **filtros):
+            horarios.append(horario)
+            if len(horarios) >= cantidad:
+                break
+        return horarios
+    
+    def iterar_horarios_disponibles(self, recursos: List[int], duracion: timedelta,
+                                    fecha_inicio: datetime = None,
+                                    fecha_limite: datetime = None,
+                                    dias_semana: Optional[Set[int]] = None,
+                                    hora_minima: Optional[time] = None,
+                                    hora_maxima: Optional[time] = None,
+                                    uno_por_dia: bool = True,
+                                    unidades: Optional[Dict[int, int]] = None) -> Iterator[Tuple[datetime, datetime]]:
+        """
+        Genera en orden los horarios disponibles para los recursos solicitados
+        
+        Args:
+            recursos: Lista de IDs de recursos necesarios
+            duracion: Duración del evento
+            fecha_inicio: Fecha desde donde empezar a buscar (por defecto: mañana)
+            fecha_limite: Fecha límite para el inicio (por defecto: 1 año)
+            dias_semana: Días permitidos para el inicio (0 = lunes ... 6 = domingo)
+            hora_minima: Hora más temprana a la que puede empezar el evento
+            hora_maxima: Hora más tardía a la que puede empezar el evento
+            uno_por_dia: Si es True, como máximo un horario por fecha
+            unidades: Unidades requeridas por recurso multiunidad (por defecto: 1)
+        
+        Returns:
+            Iterador de tuplas (inicio, fin)
+        """
         if fecha_inicio is None:
             fecha_inicio = datetime.now() + timedelta(days=1)
         
         if fecha_limite is None:
             fecha_limite = fecha_inicio + timedelta(days=365)
         
+        # Filtros que ningún instante puede cumplir
+        if dias_semana is not None and not set(dias_semana) & set(range(7)):
+            return
+        if hora_minima is not None and hora_maxima is not None and hora_minima > hora_maxima:
+            return
+        
         # Validar restricciones antes de buscar
         es_valido, mensaje = self.validar_restricciones(recursos)
         if not es_valido:
-            return None
+            return
         
-        # Buscar horario disponible
-        busqueda_actual = fecha_inicio
-        incremento = timedelta(hours=1)  # Buscar cada hora
+        # Unir los bloqueos de todos los recursos y saltar de uno al siguiente:
+        # el coste depende del número de reservas, no del rango
+        unidades = unidades or {}
+        fin_rango = fecha_limite + duracion
+        ocupaciones = []
+        for recurso_id in recursos:
+            recurso = self._obtener_recurso(recurso_id)
+            if not recurso:
+                continue
+            if not recurso.disponible:
+                return
+            ocupaciones.append(recurso.intervalos_ocupados(fecha_inicio, fin_rango,
+                                                           unidades.get(recurso_id, 1)))
         
-        while busqueda_actual < fecha_limite:
-            fin_propuesto = busqueda_actual + duracion
-            
-            # Verificar si todos los recursos están disponibles
-            todos_disponibles = True
-            for recurso_id in recursos:
-                recurso = self._obtener_recurso(recurso_id)
-                if recurso and not recurso.esta_disponible(busqueda_actual, fin_propuesto):
-                    todos_disponibles = False
+        candidato = fecha_inicio
+        for inicio_hueco, fin_hueco in huecos_libres(ocupaciones, fecha_inicio, fin_rango):
+            candidato = max(candidato, inicio_hueco)
+            while True:
+                candidato = self._siguiente_inicio_valido(candidato, dias_semana,
+                                                          hora_minima, hora_maxima)
+                if candidato >= fecha_limite:
+                    return
+                if candidato + duracion > fin_hueco:
                     break
-            
-            if todos_disponibles:
-                return (busqueda_actual, fin_propuesto)
-            
-            busqueda_actual += incremento
+                
+                yield (candidato, candidato + duracion)
+                
+                if uno_por_dia:
+                    candidato = datetime.combine(candidato.date() + timedelta(days=1), time.min)
+                else:
+                    candidato = candidato + duracion
+    
+    @staticmethod
+    def _siguiente_inicio_valido(momento: datetime, dias_semana: Optional[Set[int]],
+                                 hora_minima: Optional[time],
+                                 hora_maxima: Optional[time]) -> datetime:
+        """Primer instante >= momento que cumple los filtros de día y hora"""
+        while True:
+            if dias_semana is None or momento.weekday() in dias_semana:
+                if hora_minima is not None and momento.time() < hora_minima:
+                    momento = datetime.combine(momento.date(), hora_minima)
+                if hora_maxima is None or momento.time() <= hora_maxima:
+                    return momento
+            momento = datetime.combine(momento.date() + timedelta(days=1), time.min)
+    
+    def buscar_ventanas_libres(self, recursos: Sequence[GrupoRecursos], duracion: timedelta,
+                               fecha_inicio: datetime = None,
+                               fecha_limite: datetime = None,
+                               unidades: Optional[Dict[int, int]] = None,
+                               granularidad_minutos: int = 30) -> List[Tuple[datetime, datetime]]:
+        """
+        Ventanas en las que todos los recursos pedidos están libres a la vez
         
-        return None
+        Con NumPy instalado usa la matriz de ocupación (franjas fijas); sin él
+        recurre a la búsqueda por eventos, que no admite grupos de alternativas.
+        
+        Args:
+            recursos: IDs de recursos; un elemento puede ser una lista de IDs
+                      alternativos, de los que basta con que uno esté libre
+                      durante toda la duración
+            duracion: Duración mínima de la ventana
+            fecha_inicio: Fecha desde donde empezar a buscar (por defecto: mañana)
+            fecha_limite: Fecha límite para el inicio (por defecto: 2 años)
+            unidades: Unidades requeridas por recurso multiunidad (por defecto: 1)
+            granularidad_minutos: Tamaño de franja de la matriz (15 o 30 minutos)
+        
+        Returns:
+            Lista de tuplas (inicio, fin) con cada ventana libre completa
+        """
+        if fecha_inicio is None:
+            fecha_inicio = datetime.now() + timedelta(days=1)
+        
+        if fecha_limite is None:
+            fecha_limite = fecha_inicio + timedelta(days=730)
+        
+        # Las restricciones solo pueden comprobarse sobre los recursos fijos
+        fijos = [r for r in recursos if isinstance(r, int)]
+        es_valido, mensaje = self.validar_restricciones(fijos)
+        if not es_valido:
+            return []
+        
+        if not NUMPY_DISPONIBLE:
+            if len(fijos) < len(recursos):
+                raise ImportError("Los grupos de recursos alternativos requieren NumPy")
+            unidades = unidades or {}
+            fin_rango = fecha_limite + duracion
+            ocupaciones = []
+            for recurso_id in fijos:
+                recurso = self._obtener_recurso(recurso_id)
+                if not recurso:
+                    continue
+                if not recurso.disponible:
+                    return []
+                ocupaciones.append(recurso.intervalos_ocupados(fecha_inicio, fin_rango,
+                                                               unidades.get(recurso_id, 1)))
+            return [
+                (inicio, fin) for inicio, fin in huecos_libres(ocupaciones, fecha_inicio, fin_rango)
+                if inicio < fecha_limite and fin - inicio >= duracion
+            ]
+        
+        matriz = self.obtener_matriz_ocupacion(fecha_inicio, fecha_limite + duracion,
+                                               granularidad_minutos)
+        return matriz.ventanas_libres(recursos, duracion, fecha_inicio, fecha_limite, unidades)
+    
+    def obtener_matriz_ocupacion(self, desde: datetime, hasta: datetime,
+                                 granularidad_minutos: int = 30) -> MatrizOcupacion:
+        """Devuelve la matriz de ocupación, reconstruyéndola si no cubre el rango pedido"""
+        granularidad = timedelta(minutes=granularidad_minutos)
+        matriz = self._matriz_ocupacion
+        if matriz is None or not matriz.cubre(desde, hasta, granularidad):
+            origen = datetime.combine(desde.date(), time.min)
+            if matriz is not None and matriz.granularidad == granularidad:
+                origen = min(origen, matriz.origen)
+            horizonte = max(hasta - origen, timedelta(days=730))
+            matriz = MatrizOcupacion(self.recursos, origen, horizonte, granularidad)
+            self._matriz_ocupacion = matriz
+        return matriz
+    
+    def _actualizar_matriz_ocupacion(self, evento: Evento, signo: int):
+        """Aplica el alta (signo=1) o baja (signo=-1) de un evento a la matriz, si existe"""
+        if self._matriz_ocupacion is None:
+            return
+        for recurso_id in evento.recursos_solicitados:
+            self._matriz_ocupacion.registrar(recurso_id, evento.inicio, evento.fin,
+                                             evento.unidades_solicitadas.get(recurso_id, 1), signo)
+    
+    def obtener_recursos_ocupados(self, recursos: List[int], inicio: datetime, fin: datetime,
+                                  unidades: Optional[Dict[int, int]] = None) -> List[int]:
+        """IDs de los recursos sin unidades libres suficientes en [inicio, fin) (ocupados o sin capacidad)"""
+        unidades = unidades or {}
+        ocupados = []
+        with self._lock:
+            for recurso_id in recursos:
+                recurso = self._obtener_recurso(recurso_id)
+                if recurso and not recurso.esta_disponible(inicio, fin, unidades.get(recurso_id, 1)):
+                    ocupados.append(recurso_id)
+        return ocupados
     
     def _obtener_conflictos_recurso(self, recurso_id: int, inicio: datetime, fin: datetime) -> str:
         """Obtiene información sobre los conflictos de un recurso"""
@@ -309,33 +1120,190 @@ class DreamWeddingPlanner:
             return "Recurso no encontrado"
         
         conflictos = []
-        for evento_id, inicio_evento, fin_evento in recurso.eventos_asignados:
-            if max(inicio, inicio_evento) < min(fin, fin_evento):
-                evento = self.obtener_evento_por_id(evento_id)
-                if evento:
-                    conflictos.append(f"{evento.nombre} ({inicio_evento.strftime('%d/%m/%Y %H:%M')})")
+        for evento_id, inicio_evento, fin_evento in recurso.reservas_en_rango(inicio, fin):
+            evento = self.obtener_evento_por_id(evento_id)
+            if evento:
+                conflictos.append(f"{evento.nombre} ({inicio_evento.strftime('%d/%m/%Y %H:%M')})")
         
         return ", ".join(conflictos) if conflictos else "Sin conflictos"
     
     def obtener_eventos_proximos(self, dias: int = 30) -> List[Evento]:
-        """Obtiene eventos próximos dentro de X días"""
+        """Obtiene eventos confirmados próximos dentro de X días, ordenados por inicio"""
         fecha_actual = datetime.now()
-        fecha_limite = fecha_actual + timedelta(days=dias)
-        return [
-            e for e in self.eventos
-            if fecha_actual <= e.inicio <= fecha_limite 
-            and e.estado == EstadoEvento.CONFIRMADO
-        ]
+        return self.obtener_eventos_en_rango(fecha_actual, fecha_actual + timedelta(days=dias),
+                                             EstadoEvento.CONFIRMADO)
+    
+    def obtener_eventos_en_rango(self, desde: Optional[datetime] = None,
+                                 hasta: Optional[datetime] = None,
+                                 estado: Union[EstadoEvento, Iterable[EstadoEvento], None] = None,
+                                 tipo_boda: Union[TipoBoda, Iterable[TipoBoda], None] = None) -> List[Evento]:
+        """
+        Eventos que empiezan en [desde, hasta], ordenados por inicio
+        
+        Usa el índice ordenado por inicio: cuesta O(log n + k) con k eventos
+        en el rango. Los filtros por estado y tipo intersecan los índices
+        secundarios en lugar de recorrer los eventos; si dejan menos
+        candidatos que el rango, se parte de ellos. Con un rango de fechas se
+        cargan las particiones archivadas que lo cubren; sin él solo se
+        consultan los eventos ya en memoria (el historial se carga aparte con
+        cargar_historial()).
+        
+        Args:
+            desde: Inicio del rango (por defecto: sin límite)
+            hasta: Fin del rango, incluido (por defecto: sin límite)
+            estado: Estado o estados admitidos (por defecto: todos)
+            tipo_boda: Tipo o tipos de boda admitidos (por defecto: todos)
+        """
+        self.sincronizar()
+        if self.almacenamiento.historial_pendiente and (desde is not None or hasta is not None):
+            self.cargar_historial(desde, hasta)
+        
+        with self._lock:
+            filtros = [
+                ids for ids in (self._ids_con(self._ids_por_estado, estado),
+                                self._ids_con(self._ids_por_tipo, tipo_boda))
+                if ids is not None
+            ]
+            if not filtros:
+                ids = self._indice_inicios.en_rango(desde, hasta)
+            else:
+                candidatos = set.intersection(*sorted(filtros, key=len))
+                if len(candidatos) < self._indice_inicios.contar(desde, hasta):
+                    ids = sorted(
+                        (eid for eid in candidatos
+                         if (desde is None or self._eventos_por_id[eid].inicio >= desde)
+                         and (hasta is None or self._eventos_por_id[eid].inicio <= hasta)),
+                        key=lambda eid: self._eventos_por_id[eid].inicio
+                    )
+                else:
+                    ids = [eid for eid in self._indice_inicios.en_rango(desde, hasta) if eid in candidatos]
+            return [self._eventos_por_id[eid] for eid in ids]
+    
+    @staticmethod
+    def _ids_con(indice: Dict, valores) -> Optional[Set[int]]:
+        """IDs de un índice secundario con alguno de los valores; None si no se filtra"""
+        if valores is None:
+            return None
+        if isinstance(valores, (EstadoEvento, TipoBoda)):
+            return indice.get(valores, set())
+        return set().union(*(indice.get(valor, set()) for valor in valores))
+    
+    def buscar(self, consulta: str, limite: Optional[int] = 20,
+               estado: Union[EstadoEvento, Iterable[EstadoEvento], None] = None,
+               tipo_boda: Union[TipoBoda, Iterable[TipoBoda], None] = None) -> List[Tuple[Union[Evento, Recurso], float]]:
+        """
+        Busca eventos y recursos por nombre o descripción
+        
+        La consulta no distingue tildes ni mayúsculas, ignora las palabras
+        vacías y cada palabra de tres o más letras coincide también como
+        prefijo ("mar" encuentra "María"). Un resultado debe contener todas
+        las palabras. Solo se buscan los eventos en memoria: los archivados
+        entran tras cargar_historial().
+        
+        Args:
+            consulta: Texto libre
+            limite: Máximo de resultados (None: todos)
+            estado: Estado o estados de los eventos admitidos (por defecto: todos)
+            tipo_boda: Tipo o tipos de boda de los eventos admitidos (por defecto: todos)
+        
+        Los filtros se aplican antes de limitar los resultados y no afectan
+        a los recursos.
+        
+        Returns:
+            Lista de (evento o recurso, puntuación), de más a menos relevante
+        """
+        self.sincronizar()
+        
+        with self._lock:
+            indice = self._obtener_indice_busqueda()
+            filtros = [
+                ids for ids in (self._ids_con(self._ids_por_estado, estado),
+                                self._ids_con(self._ids_por_tipo, tipo_boda))
+                if ids is not None
+            ]
+            admitidos = None
+            if filtros:
+                permitidos = set.intersection(*sorted(filtros, key=len))
+                admitidos = lambda clave: clave[0] != 'evento' or clave[1] in permitidos
+            resultados = []
+            for (tipo, identificador), puntuacion in indice.buscar(consulta, limite, admitidos):
+                if tipo == 'evento':
+                    objeto = self._eventos_por_id.get(identificador)
+                else:
+                    objeto = self._recursos_por_id.get(identificador)
+                if objeto is not None:
+                    resultados.append((objeto, puntuacion))
+            return resultados
+    
+    def _obtener_indice_busqueda(self) -> IndiceBusqueda:
+        """Índice de texto, construido la primera vez y mantenido después con cada cambio"""
+        if self._indice_busqueda is None:
+            indice = IndiceBusqueda()
+            for recurso in self.recursos:
+                indice.agregar(('recurso', recurso.id), recurso.nombre, recurso.descripcion)
+            for evento in self.eventos:
+                indice.agregar(('evento', evento.id), evento.nombre, evento.descripcion)
+            self._indice_busqueda = indice
+        return self._indice_busqueda
     
     def obtener_evento_por_id(self, evento_id: int) -> Optional[Evento]:
         """Busca un evento por ID"""
-        for evento in self.eventos:
-            if evento.id == evento_id:
-                return evento
-        return None
+        return self._eventos_por_id.get(evento_id)
     
     def obtener_estadisticas(self) -> Dict:
-        """Obtiene estadísticas del sistema"""
+        """
+        Obtiene estadísticas del sistema
+        
+        Salen de los agregados que se mantienen al crear, eliminar o cambiar
+        de estado un evento, sin recorrer los datos. Con
+        ConfiguracionApp.VERIFICAR_ESTADISTICAS se comparan con un recálculo
+        completo y se avisa de las diferencias.
+        """
+        self.sincronizar()
+        if self.almacenamiento.historial_pendiente:
+            # Con particiones archivadas sin cargar, solo el backend ve todos los eventos
+            estadisticas = None if self._guardado.pendiente else self.almacenamiento.estadisticas()
+            if estadisticas is not None:
+                return estadisticas
+            self.cargar_historial()
+        
+        with self._lock:
+            if ConfiguracionApp.VERIFICAR_ESTADISTICAS:
+                diferencias = self.verificar_estadisticas()
+                if diferencias:
+                    print(f"Aviso: estadísticas incrementales desfasadas: {diferencias}")
+                    self._recalcular_agregados()
+            return self._estadisticas_agregadas()
+    
+    def _estadisticas_agregadas(self) -> Dict:
+        """Estadísticas en O(1) a partir de los agregados"""
+        confirmados, ingresos = self._agregados.get(EstadoEvento.CONFIRMADO, (0, 0.0))
+        return {
+            "total_eventos": len(self._eventos_por_id),
+            "eventos_confirmados": confirmados,
+            "eventos_pendientes": self._agregados.get(EstadoEvento.PENDIENTE, (0, 0.0))[0],
+            "eventos_completados": self._agregados.get(EstadoEvento.COMPLETADO, (0, 0.0))[0],
+            "ingresos_totales": ingresos,
+            "recursos_totales": len(self.recursos),
+            "recursos_disponibles": self._recursos_disponibles,
+            "promedio_presupuesto": ingresos / confirmados if confirmados else 0
+        }
+    
+    def verificar_estadisticas(self) -> Dict[str, Tuple]:
+        """
+        Compara las estadísticas incrementales con un recálculo completo
+        Retorna {clave: (incremental, recalculado)} con las que no coinciden
+        """
+        incrementales = self._estadisticas_agregadas()
+        completas = self._estadisticas_completas()
+        return {
+            clave: (incrementales[clave], valor)
+            for clave, valor in completas.items()
+            if not math.isclose(incrementales[clave], valor, rel_tol=1e-9, abs_tol=1e-6)
+        }
+    
+    def _estadisticas_completas(self) -> Dict:
+        """Estadísticas recorriendo todos los eventos y recursos"""
         confirmados = [e for e in self.eventos if e.estado == EstadoEvento.CONFIRMADO]
         return {
             "total_eventos": len(self.eventos),
@@ -350,10 +1318,7 @@ class DreamWeddingPlanner:
     
     def _obtener_recurso(self, recurso_id: int) -> Optional[Recurso]:
         """Busca un recurso por ID"""
-        for recurso in self.recursos:
-            if recurso.id == recurso_id:
-                return recurso
-        return None
+        return self._recursos_por_id.get(recurso_id)
     
     def obtener_recurso_por_nombre(self, nombre: str) -> Optional[Recurso]:
         """Busca un recurso por nombre"""
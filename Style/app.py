@@ -53,6 +53,8 @@ def renderizar_sidebar(planner):
     except Exception as e:
         st.sidebar.caption(f"📊 Estadísticas no disponibles: {str(e)}")
     st.sidebar.markdown("---")
+    if planner.tiempos_carga:
+        st.sidebar.caption(f"⏱️ Datos cargados en {planner.tiempos_carga['total'] * 1000:.0f} ms")
     renderizar_info_version()
     return pagina_seleccionada
 
@@ -72,6 +74,8 @@ def main():
     inicializar_sesion()
     planner     = st.session_state.planner
     calculadora = st.session_state.calculadora
+    # Otras sesiones o scripts pueden haber guardado cambios desde la última recarga
+    planner.sincronizar()
     aplicar_estilos()
 
     # Resolver navegación interna (botones de páginas) ANTES del sidebar.
@@ -2,7 +2,7 @@
 
 import streamlit as st
 from datetime import datetime, timedelta
-from Logic.models import TipoBoda, TipoRecurso
+from Logic.models import TipoBoda, TipoRecurso, EstadoEvento, Evento, Recurso
 from Logic.config import obtener_paquetes, obtener_temas, ConfiguracionApp
 from Style.components import (
     mostrar_metricas_dashboard,
@@ -26,6 +26,9 @@ def pagina_dashboard(planner):
     
     # Próximos eventos
     st.subheader("📅 Próximas Bodas (30 días)")
+    inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(microseconds=1)
+    st.caption(f"📆 {len(planner.obtener_eventos_en_rango(inicio_mes, fin_mes))} boda(s) este mes")
     eventos_proximos = planner.obtener_eventos_proximos(30)
     
     if eventos_proximos:
@@ -195,8 +198,14 @@ def pagina_crear_boda(planner):
                         st.session_state.boda_error = None
                     else:
                         st.error(f"❌ {mensaje}")
-                        # Guardar datos para búsqueda alternativa fuera del form
-                        if "no disponible" in mensaje.lower():
+                        faltantes = planner.sugerir_recursos_requeridos(recursos_totales)
+                        if faltantes:
+                            nombres = [planner._obtener_recurso(rid).nombre for rid in faltantes
+                                       if planner._obtener_recurso(rid)]
+                            st.info(f"💡 Recursos requeridos que faltan: {', '.join(nombres)}")
+                        # Guardar datos para búsqueda alternativa fuera del form si el
+                        # fallo es de disponibilidad (recurso ocupado o sin unidades suficientes)
+                        if planner.obtener_recursos_ocupados(recursos_totales, inicio, fin):
                             st.session_state.boda_error = {
                                 "recursos": recursos_totales,
                                 "duracion": duracion,
@@ -425,19 +434,44 @@ def pagina_gestionar_eventos(planner):
     """Página para ver y eliminar todos los eventos registrados"""
     st.title("📋 Gestionar Eventos")
 
+    # Con el almacenamiento particionado los meses antiguos se cargan a petición
+    if planner.almacenamiento.historial_pendiente and st.button("📚 Cargar historial archivado"):
+        cargados = planner.cargar_historial()
+        st.success(f"Se cargaron {cargados} evento(s) archivados")
+
     todos = planner.eventos  # todos los eventos, no solo próximos
     if not todos:
         st.info("📭 No hay eventos registrados en el sistema.")
         return
 
-    # Filtro rápido por estado
-    estados_disponibles = list({e.estado.value for e in todos})
-    estado_filtro = st.multiselect(
-        "🔍 Filtrar por estado",
-        options=estados_disponibles,
-        default=[]
-    )
-    eventos_filtrados = [e for e in todos if e.estado.value in estado_filtro] if estado_filtro else todos
+    # Filtros rápidos por estado y tipo de boda (resueltos con los índices del planner)
+    col_estado, col_tipo = st.columns(2)
+    with col_estado:
+        estado_filtro = st.multiselect(
+            "🔍 Filtrar por estado",
+            options=[estado.value for estado in EstadoEvento],
+            default=[]
+        )
+    with col_tipo:
+        tipo_filtro = st.multiselect(
+            "🎨 Filtrar por tipo de boda",
+            options=[tipo.value for tipo in TipoBoda],
+            default=[]
+        )
+    estados = [EstadoEvento(valor) for valor in estado_filtro] or None
+    tipos = [TipoBoda(valor) for valor in tipo_filtro] or None
+    eventos_filtrados = planner.obtener_eventos_en_rango(estado=estados, tipo_boda=tipos)
+
+    # Búsqueda de texto: los eventos se muestran por relevancia
+    consulta = st.text_input("🔎 Buscar por novios, notas o proveedor",
+                             placeholder="Ej.: maria jardin")
+    if consulta.strip():
+        # Los filtros se aplican dentro de la búsqueda, antes del límite
+        resultados = planner.buscar(consulta, limite=100, estado=estados, tipo_boda=tipos)
+        recursos_encontrados = [objeto for objeto, _ in resultados if isinstance(objeto, Recurso)]
+        if recursos_encontrados:
+            st.caption("🛏️ Recursos: " + ", ".join(r.nombre for r in recursos_encontrados))
+        eventos_filtrados = [objeto for objeto, _ in resultados if isinstance(objeto, Evento)]
 
     st.markdown(f"**{len(eventos_filtrados)} evento(s) encontrado(s)**")
     st.markdown("---")
@@ -465,6 +499,16 @@ def pagina_gestionar_eventos(planner):
                             nombres.append(r.nombre)
                     st.write(f"**🛏️ Recursos:** {', '.join(nombres)}")
             with col_accion:
+                estados = [estado.value for estado in EstadoEvento]
+                nuevo_estado = st.selectbox("Estado", estados, index=estados.index(evento.estado.value),
+                                            key=f"estado_{evento.id}")
+                if nuevo_estado != evento.estado.value:
+                    exito, msg = planner.cambiar_estado_evento(evento.id, EstadoEvento(nuevo_estado))
+                    if exito:
+                        st.rerun()
+                    else:
+                        st.error(msg)
+
                 # Confirmación en dos pasos usando session_state
                 clave_confirm = f"confirmar_del_{evento.id}"
                 if st.session_state.get(clave_confirm):
@@ -491,15 +535,14 @@ def pagina_gestionar_eventos(planner):
 
     st.markdown("---")
     st.subheader("📊 Resumen")
+    estadisticas = planner.obtener_estadisticas()
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total eventos", len(todos))
+        st.metric("Total eventos", estadisticas['total_eventos'])
     with col2:
-        confirmados = sum(1 for e in todos if e.estado.value == "confirmado")
-        st.metric("Confirmados", confirmados)
+        st.metric("Confirmados", estadisticas['eventos_confirmados'])
     with col3:
-        ingresos = sum(e.presupuesto for e in todos if e.estado.value == "confirmado")
-        st.metric("Ingresos totales", f"${ingresos:,.0f}")
+        st.metric("Ingresos totales", f"${estadisticas['ingresos_totales']:,.0f}")
 
 
 def pagina_buscar_horario(planner):
@@ -549,24 +592,52 @@ def pagina_buscar_horario(planner):
         fecha_inicio_busqueda = st.date_input("📅 Buscar desde", 
                                              min_value=datetime.today())
         
-        submitted = st.form_submit_button("🔍 Buscar Horario", 
+        st.subheader("Filtros opcionales")
+        col_f1, col_f2, col_f3 = st.columns(3)
+        with col_f1:
+            dias_opcion = st.selectbox(
+                "📆 Días",
+                options=["Todos", "Entre semana (lun-vie)", "Fines de semana"]
+            )
+            cantidad = st.number_input("🔢 Número de opciones", 
+                                      min_value=1, max_value=10, value=5)
+        # Las horas solo se aplican si se marca su casilla
+        with col_f2:
+            usar_hora_minima = st.checkbox("Limitar hora más temprana")
+            hora_minima = st.time_input("🕐 Empezar después de", 
+                                        value=datetime.strptime("10:00", "%H:%M").time())
+        with col_f3:
+            usar_hora_maxima = st.checkbox("Limitar hora más tardía")
+            hora_maxima = st.time_input("🕔 Empezar antes de", 
+                                        value=datetime.strptime("18:00", "%H:%M").time())
+        
+        submitted = st.form_submit_button("🔍 Buscar Horarios", 
                                         type="primary", use_container_width=True)
         
         if submitted:
             recursos_totales = [recurso_cer_sel, recurso_rec_sel] + recursos_per_sel
+            dias_semana = {
+                "Todos": None,
+                "Entre semana (lun-vie)": {0, 1, 2, 3, 4},
+                "Fines de semana": {5, 6},
+            }[dias_opcion]
             
-            with st.spinner("Buscando horario disponible..."):
-                horario = planner.buscar_horario_disponible(
+            with st.spinner("Buscando horarios disponibles..."):
+                horarios = planner.buscar_horarios_disponibles(
                     recursos=recursos_totales,
                     duracion=timedelta(hours=duracion),
+                    cantidad=cantidad,
                     fecha_inicio=datetime.combine(fecha_inicio_busqueda, 
-                                                 datetime.min.time())
+                                                 datetime.min.time()),
+                    dias_semana=dias_semana,
+                    hora_minima=hora_minima if usar_hora_minima else None,
+                    hora_maxima=hora_maxima if usar_hora_maxima else None
                 )
             
-            if horario:
-                inicio, fin = horario
-                st.success("✅ ¡Horario disponible encontrado!")
-                mostrar_horario_disponible(inicio, fin)
+            if horarios:
+                st.success(f"✅ ¡{len(horarios)} horario(s) disponible(s) encontrado(s)!")
+                for inicio, fin in horarios:
+                    mostrar_horario_disponible(inicio, fin)
                 st.write("**Recursos seleccionados:**")
                 for recurso_id in recursos_totales:
                     recurso = planner._obtener_recurso(recurso_id)
@@ -574,21 +645,27 @@ def pagina_buscar_horario(planner):
                         st.write(f"• {recurso.nombre} - ${recurso.precio:,}")
                 # Guardar en session_state para usar el botón fuera del form
                 st.session_state.horario_encontrado = {
-                    "horario": horario,
+                    "horarios": horarios,
                     "recursos": recursos_totales
                 }
             else:
                 st.error("❌ No se encontró ningún horario disponible en el próximo año.")
-                st.info("💡 Intenta con otros recursos o una fecha diferente.")
+                st.info("💡 Intenta con otros recursos, otra fecha o filtros menos estrictos.")
                 st.session_state.horario_encontrado = None
 
-    # ── Botón fuera del form ──
+    # ── Selección y botón fuera del form ──
     if st.session_state.get("horario_encontrado"):
+        datos = st.session_state.horario_encontrado
+        horario = st.radio(
+            "Elige un horario",
+            options=datos["horarios"],
+            format_func=lambda h: f"{h[0].strftime('%d/%m/%Y %H:%M')} - {h[1].strftime('%H:%M')}",
+            key="radio_horario_encontrado"
+        )
         if st.button("💍 Crear Boda con este Horario", type="primary",
                      key="btn_crear_desde_horario"):
-            datos = st.session_state.horario_encontrado
-            st.session_state.horario_sugerido = datos["horario"]
+            st.session_state.horario_sugerido = horario
             st.session_state.recursos_sugeridos = datos["recursos"]
             st.session_state.horario_encontrado = None
             st.session_state.pagina = "crear_boda"
-            st.rerun()
\ No newline at end of file
+            st.rerun()